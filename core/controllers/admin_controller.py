@@ -3,6 +3,13 @@ import logging
 from fastapi import APIRouter, HTTPException
 
 from core.dao.firebase_client import FirebaseClient
+from core.services.buffer.buffer_collector import buffer_collector
+from core.services.assistant_metadata_cache import assistant_metadata_cache
+from core.services.buffer.buffer_service import BufferService
+from core.services.buffer.tenant_policy import tenant_policy
+from core.services.openai_client_registry import OpenaiClientRegistry
+from core.services.openai_rate_limiter import openai_rate_limiter
+from core.services.tool_executor import tool_executor
 
 admin_router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -13,15 +20,14 @@ def purge_user_data(user_phone: str):
     try:
         deleted_paths = []
 
-        establishments = FirebaseClient.fetch_data("establishments")
-        for establishment_phone, establishment_data in establishments.items():
+        for establishment_phone, _ in FirebaseClient.iter_children("establishments"):
             user_path = f"establishments/{establishment_phone}/users/{user_phone}"
             if FirebaseClient.delete_data(user_path):
                 deleted_paths.append(user_path)
 
-        user_buffer_path = f"message_buffers/{user_phone}"
-        if FirebaseClient.delete_data(user_buffer_path):
-            deleted_paths.append(user_buffer_path)
+            user_buffer_path = BufferService.get_buffer_path(BufferService.get_buffer_key(establishment_phone, user_phone))
+            if FirebaseClient.delete_data(user_buffer_path):
+                deleted_paths.append(user_buffer_path)
 
         logger.warning(f"[ADMIN] Dados do usuário {user_phone} removidos: {deleted_paths}")
         return {"status": "success", "deleted": deleted_paths}
@@ -39,6 +45,10 @@ def purge_establishment_data(establishment_phone: str):
         if FirebaseClient.delete_data(delete_path):
             deleted_paths.append(delete_path)
 
+        for buffer_path in BufferService.get_establishment_buffer_paths(establishment_phone):
+            if FirebaseClient.delete_data(buffer_path):
+                deleted_paths.append(buffer_path)
+
         logger.warning(f"[ADMIN] Dados de usuários do estabelecimento {establishment_phone} removidos: {deleted_paths}")
         return {"status": "success", "deleted": deleted_paths}
 
@@ -48,39 +58,71 @@ def purge_establishment_data(establishment_phone: str):
 
 
 @admin_router.delete("/admin/purge/establishment/{establishment_phone}/users/threads/{agent_name}")
-def clear_agent_threads(establishment_id: str, agent_name: str):
+def clear_agent_threads(establishment_phone: str, agent_name: str):
     try:
-        users = FirebaseClient.fetch_data(f"/establishments/{establishment_id}/users")
+        user_phones = FirebaseClient.fetch_keys(f"establishments/{establishment_phone}/users")
 
-        if not users:
+        if not user_phones:
             raise HTTPException(status_code=404, detail="Nenhum usuário encontrado para esse estabelecimento.")
 
-        for user_phone, user_data in users.items():
-            FirebaseClient.delete_data(
-                f"/establishments/{establishment_id}/users/{user_phone}/conversations/threads/{agent_name}")
+        FirebaseClient.multi_update({
+            f"establishments/{establishment_phone}/users/{user_phone}/conversations/threads/{agent_name}": None
+            for user_phone in user_phones
+        })
         logger.warning(
-            f"[ADMIN] Dados de threads do estabelecimento {establishment_id}/ {len(users.users.items())} usuários removidos para agente: {agent_name}")
+            f"[ADMIN] Dados de threads do estabelecimento {establishment_phone}/ {len(user_phones)} usuários removidos para agente: {agent_name}")
         return {"success": True, "message": f"Threads do agente '{agent_name}' removidos com sucesso."}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao limpar threads: {str(e)}")
 
 
-@admin_router.delete("/admin/buffers/clear-replica-ids")
-def clear_all_replica_ids():
-    try:
-        buffers = FirebaseClient.fetch_data("message_buffers") or {}
-        cleared = []
+@admin_router.get("/admin/cache/firebase")
+def get_firebase_cache_stats():
+    return FirebaseClient.get_cache_stats()
 
-        for user_phone, data in buffers.items():
-            updates = {
-                "replica_id": None,
-            }
-            FirebaseClient.update_data(f"message_buffers/{user_phone}", updates)
-            cleared.append(user_phone)
 
-        logger.warning(f"[ADMIN] replica_id limpo de {len(cleared)} usuários: {cleared}")
-        return {"status": "success", "cleared_users": cleared}
+@admin_router.get("/admin/cache/assistants")
+def get_assistant_cache_stats():
+    return assistant_metadata_cache.stats()
 
-    except Exception as e:
-        logger.error(f"[ADMIN] Erro ao limpar replica_ids: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao limpar replica_ids: {str(e)}")
+
+@admin_router.delete("/admin/cache/assistants")
+def invalidate_assistant_cache():
+    return {"status": "success", "invalidated": assistant_metadata_cache.invalidate()}
+
+
+@admin_router.delete("/admin/cache/assistants/{assistant_id}")
+def invalidate_assistant(assistant_id: str):
+    return {"status": "success", "invalidated": assistant_metadata_cache.invalidate(assistant_id)}
+
+
+@admin_router.delete("/admin/cache/tenants")
+def invalidate_tenant_policies():
+    return {"status": "success", "invalidated": tenant_policy.invalidate()}
+
+
+@admin_router.delete("/admin/cache/tenants/{business_phone}")
+def invalidate_tenant_policy(business_phone: str):
+    return {"status": "success", "invalidated": tenant_policy.invalidate(business_phone)}
+
+
+@admin_router.get("/admin/buffers/metrics")
+def get_buffer_metrics():
+    return buffer_collector.metrics()
+
+
+@admin_router.get("/admin/tools/metrics")
+def get_tool_metrics():
+    return tool_executor.metrics()
+
+
+@admin_router.get("/admin/openai/rate-limits")
+def get_openai_rate_limits():
+    return {"clients": OpenaiClientRegistry.stats(), "keys": openai_rate_limiter.metrics()}
+
+
+@admin_router.delete("/admin/openai/clients/{business_phone}")
+def evict_openai_client(business_phone: str):
+    return {"status": "success", "evicted": OpenaiClientRegistry.evict(business_phone)}
@@ -2,15 +2,12 @@ import base64
 import os
 import tempfile
 
-from openai import OpenAI
-
-from core.dao.firebase_client import FirebaseClient
+from core.services.openai_client_registry import OpenaiClientRegistry
 
 
 def _transcribe_audio_from_base64(business_phone: str, base64_data: str, extension=".ogg") -> str:
     try:
-        openai_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
-        client = OpenAI(api_key=openai_key)
+        client = OpenaiClientRegistry.get_client(business_phone)
         audio_bytes = base64.b64decode(base64_data)
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as temp_file:
@@ -5,6 +5,7 @@ class PresenceUpdateDTO:
         self.event = payload.get("event")
         self.presences = payload.get("data", {}).get("presences", {})
         self.instance_name = payload.get("instance", "")
+        self.business_phone = payload.get("sender", "").split("@")[0]
 
         if not isinstance(self.presences, dict):
             raise ValueError("Formato inválido para 'presences'")
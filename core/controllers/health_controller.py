@@ -6,7 +6,7 @@ import socket
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
-from core.dao.firebase_client import FirebaseClient
+from core.dao.async_firebase_client import AsyncFirebaseClient
 
 health_router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 async def health_check():
     try:
         environment_name = os.environ.get('RAILWAY_ENVIRONMENT_NAME')
-        firebase_ok = _check_firebase_connection()
+        firebase_ok = await _check_firebase_connection()
 
         system_info = {
             "hostname": socket.gethostname(),
@@ -48,10 +48,9 @@ async def health_check():
         }, status_code=503)
 
 
-def _check_firebase_connection():
+async def _check_firebase_connection():
     try:
-        ref = FirebaseClient.get_reference('healthcheck_status')
-        ref.get()
+        await AsyncFirebaseClient.ping()
         return True
     except Exception as e:
         logger.error(f"Erro ao verificar conexão com Firebase: {str(e)}")
@@ -1,11 +1,12 @@
 import logging
 
 from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
 from core.controllers.dto.message_upsert_dto import MessageUpsertDTO
 from core.controllers.dto.precense_update_dto import PresenceUpdateDTO
-from core.dao.firebase_client import FirebaseClient
+from core.dao.async_firebase_client import AsyncFirebaseClient
 from core.services.buffer.buffer_service import BufferService
 from core.services.incoming_service import IncomingService
 
@@ -20,12 +21,14 @@ async def evolution_presence_update(request: Request):
         data = await request.json()
         incoming = PresenceUpdateDTO(data)
         user_phone, last_presence = incoming.get_user_presence_info()
-        logger.debug(f"[evolution_presence_update] {user_phone} -> {last_presence}")
-        user_buffer = FirebaseClient.fetch_data(f"message_buffers/{user_phone}")
-        if not user_buffer:
+        logger.debug(f"[evolution_presence_update] {incoming.business_phone} -> {user_phone} -> {last_presence}")
+        buffer_key = BufferService.get_buffer_key(incoming.business_phone, user_phone)
+        user_buffer = await AsyncFirebaseClient.fetch_data(BufferService.get_buffer_path(buffer_key))
+        if not user_buffer or not BufferService.get_buffer_messages(user_buffer):
             logger.warning(f"[evolution_presence_update] Não encontrado buffer para usuário: {user_phone}")
             return JSONResponse(content={"status": "success"})
-        BufferService.update_presence_to_buffer(user_phone, last_presence)
+        await run_in_threadpool(BufferService.update_presence_to_buffer, incoming.business_phone, user_phone,
+                                last_presence, user_buffer)
         return JSONResponse(content={"status": "success"})
     except ValueError as ve:
         logger.warning(f"[evolution_presence_update]: Dados inválidos: {str(ve)}")
@@ -40,12 +43,12 @@ async def evolution_messages_upsert(request: Request):
     try:
         payload = await request.json()
         logger.debug(f"[evolution_messages_upsert] Payload: {payload}")
-        incoming = MessageUpsertDTO(payload)
-        if _is_area_code_not_permitted(incoming.user_phone_area_code, incoming.business_phone):
+        incoming = await run_in_threadpool(MessageUpsertDTO, payload)
+        if await _is_area_code_not_permitted(incoming.user_phone_area_code, incoming.business_phone):
             logger.warning(
                 f"[evolution_messages_upsert] Telefone diferente do código de área permitido: {incoming.user_phone}")
             return JSONResponse(content={"status": "success"})
-        IncomingService.handle_incoming_message(incoming)
+        await run_in_threadpool(IncomingService.handle_incoming_message, incoming)
         return JSONResponse(content={"status": "success"})
     except ValueError as ve:
         logger.warning(f"[evolution_messages_upsert] Dados inválidos: {str(ve)}")
@@ -55,9 +58,9 @@ async def evolution_messages_upsert(request: Request):
         return JSONResponse(content={"status": "error", "message": str(e)}, status_code=500)
 
 
-def _is_area_code_not_permitted(user_phone_area_code: str, business_phone: str) -> bool:
+async def _is_area_code_not_permitted(user_phone_area_code: str, business_phone: str) -> bool:
     config_path = f"establishments/{business_phone}/config"
-    establishment_config = FirebaseClient.fetch_data(config_path)
+    establishment_config = await AsyncFirebaseClient.fetch_data(config_path)
 
     if not establishment_config:
         logger.warning(
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+from urllib.parse import urlparse
+
+import httpx
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2 import service_account
+
+from core.dao.firebase_client import FirebaseClient, firebase_cache, get_firebase_settings
+from core.utils.constants import FIREBASE_ASYNC_ENABLED, FIREBASE_ASYNC_MAX_CONNECTIONS, \
+    FIREBASE_ASYNC_TIMEOUT_SECONDS, get_environment, FIREBASE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+REST_ENABLED = FIREBASE_ASYNC_ENABLED and FIREBASE_BACKEND == "firebase"
+
+FIREBASE_SCOPES = [
+    "https://www.googleapis.com/auth/firebase.database",
+    "https://www.googleapis.com/auth/userinfo.email"
+]
+
+
+class AsyncFirebaseClient:
+    _http_client = None
+    _credentials = None
+    _token_lock = None
+    _base_url = None
+    _base_params = {}
+
+    @staticmethod
+    async def fetch_data(path):
+        if not REST_ENABLED:
+            return await asyncio.to_thread(FirebaseClient.fetch_data, path)
+        if firebase_cache:
+            cached, value = firebase_cache.get(path)
+            if cached:
+                return value
+        try:
+            data = await AsyncFirebaseClient._request("GET", path)
+            if firebase_cache:
+                firebase_cache.put(path, data)
+            return data
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados de '{path}': {str(e)}")
+            return None
+
+    @staticmethod
+    async def save_data(path, data):
+        if not REST_ENABLED:
+            return await asyncio.to_thread(FirebaseClient.save_data, path, data)
+        try:
+            await AsyncFirebaseClient._request("PUT", path, json=data, params={"print": "silent"})
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao salvar dados em '{path}': {str(e)}")
+            return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    async def update_data(path, updates):
+        if not REST_ENABLED:
+            return await asyncio.to_thread(FirebaseClient.update_data, path, updates)
+        try:
+            await AsyncFirebaseClient._request("PATCH", path, json=updates, params={"print": "silent"})
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao atualizar dados em '{path}': {str(e)}")
+            return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    async def delete_data(path):
+        if not REST_ENABLED:
+            return await asyncio.to_thread(FirebaseClient.delete_data, path)
+        try:
+            await AsyncFirebaseClient._request("DELETE", path, params={"print": "silent"})
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao excluir dados de '{path}': {str(e)}")
+            return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    async def push_data(path, data):
+        if not REST_ENABLED:
+            return await asyncio.to_thread(FirebaseClient.push_data, path, data)
+        try:
+            response = await AsyncFirebaseClient._request("POST", path, json=data)
+            return response.get("name") if response else None
+        except Exception as e:
+            logger.error(f"Erro ao inserir dados em '{path}': {str(e)}")
+            return None
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    async def ping():
+        if not REST_ENABLED:
+            await asyncio.to_thread(FirebaseClient.get_reference("healthcheck_status").get)
+            return
+        await AsyncFirebaseClient._request("GET", "healthcheck_status", params={"shallow": "true"})
+
+    @staticmethod
+    async def aclose():
+        if AsyncFirebaseClient._http_client:
+            await AsyncFirebaseClient._http_client.aclose()
+            AsyncFirebaseClient._http_client = None
+
+    @staticmethod
+    async def _request(method, path, json=None, params=None):
+        client = AsyncFirebaseClient._get_http_client()
+        token = await AsyncFirebaseClient._get_access_token()
+        url = f"{AsyncFirebaseClient._base_url}/{path.strip('/')}.json"
+        response = await client.request(
+            method,
+            url,
+            json=json,
+            params={**AsyncFirebaseClient._base_params, **(params or {})},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    @staticmethod
+    def _get_http_client():
+        if AsyncFirebaseClient._http_client is None:
+            AsyncFirebaseClient._configure_base_url()
+            AsyncFirebaseClient._http_client = httpx.AsyncClient(
+                timeout=FIREBASE_ASYNC_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=FIREBASE_ASYNC_MAX_CONNECTIONS,
+                                    max_keepalive_connections=FIREBASE_ASYNC_MAX_CONNECTIONS)
+            )
+        return AsyncFirebaseClient._http_client
+
+    @staticmethod
+    def _configure_base_url():
+        db_url = os.environ.get("FIREBASE_URL" if get_environment() == 'production' else "FIREBASE_URL_HOMOLOG")
+        emulator_host = os.environ.get("FIREBASE_DATABASE_EMULATOR_HOST")
+        if emulator_host:
+            namespace = urlparse(db_url).hostname.split(".")[0] if db_url else "local"
+            AsyncFirebaseClient._base_url = f"http://{emulator_host}"
+            AsyncFirebaseClient._base_params = {"ns": namespace}
+            logger.debug(f"[AsyncFirebaseClient] Utilizando emulador em {emulator_host} (ns={namespace})")
+        else:
+            _, db_url = get_firebase_settings()
+            AsyncFirebaseClient._base_url = db_url.rstrip("/")
+            AsyncFirebaseClient._base_params = {}
+
+    @staticmethod
+    async def _get_access_token():
+        if os.environ.get("FIREBASE_DATABASE_EMULATOR_HOST"):
+            return "owner"
+        if AsyncFirebaseClient._token_lock is None:
+            AsyncFirebaseClient._token_lock = asyncio.Lock()
+        async with AsyncFirebaseClient._token_lock:
+            credentials = AsyncFirebaseClient._credentials
+            if credentials is None:
+                cred_json, _ = get_firebase_settings()
+                credentials = service_account.Credentials.from_service_account_info(cred_json, scopes=FIREBASE_SCOPES)
+                AsyncFirebaseClient._credentials = credentials
+            if not credentials.valid:
+                await asyncio.to_thread(credentials.refresh, GoogleAuthRequest())
+                logger.debug("[AsyncFirebaseClient] Token OAuth renovado")
+            return credentials.token
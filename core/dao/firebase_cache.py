@@ -0,0 +1,93 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_path(path: str) -> str:
+    return path.strip("/")
+
+
+class FirebaseCache:
+
+    def __init__(self, ttl_rules: dict, max_entries: int):
+        self._ttl_rules = [(_normalize_path(rule).split("/"), ttl) for rule, ttl in ttl_rules.items()]
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_ttl(self, path: str):
+        segments = _normalize_path(path).split("/")
+        best_ttl = None
+        best_length = -1
+        for rule_segments, ttl in self._ttl_rules:
+            if len(rule_segments) > len(segments) or len(rule_segments) <= best_length:
+                continue
+            if all(rule == "*" or rule == segment for rule, segment in zip(rule_segments, segments)):
+                best_ttl = ttl
+                best_length = len(rule_segments)
+        return best_ttl
+
+    def get(self, path: str):
+        key = _normalize_path(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return True, copy.deepcopy(value)
+
+    def put(self, path: str, value):
+        ttl = self.get_ttl(path)
+        if not ttl:
+            return
+        key = _normalize_path(path)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path: str):
+        key = _normalize_path(path)
+        with self._lock:
+            stale = [cached for cached in self._entries
+                     if not key or cached == key or cached.startswith(f"{key}/") or key.startswith(f"{cached}/")]
+            for cached in stale:
+                del self._entries[cached]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"[FirebaseCache] {len(stale)} entradas invalidadas por escrita em '{key}'")
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
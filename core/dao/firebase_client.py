@@ -5,11 +5,16 @@ import os
 import firebase_admin
 from firebase_admin import credentials, db
 
+from core.dao.firebase_cache import FirebaseCache
+from core.dao.local_database import LocalDatabase
 from core.utils.base64_utils import decode_text
-from core.utils.constants import get_environment
+from core.utils.constants import get_environment, FIREBASE_CACHE_ENABLED, FIREBASE_CACHE_TTL_SECONDS, \
+    FIREBASE_CACHE_MAX_ENTRIES, FIREBASE_BACKEND, FIREBASE_LOCAL_SEED_FILE
 
 logger = logging.getLogger(__name__)
 _firebase_instances = {}
+firebase_cache = FirebaseCache(FIREBASE_CACHE_TTL_SECONDS, FIREBASE_CACHE_MAX_ENTRIES) if FIREBASE_CACHE_ENABLED else None
+local_database = LocalDatabase() if FIREBASE_BACKEND == "local" else None
 
 
 def init_firebase():
@@ -17,20 +22,13 @@ def init_firebase():
     if environment in _firebase_instances:
         return _firebase_instances[environment]
 
+    if local_database:
+        return init_local_database(environment)
+
     logger.debug(f"Inicializando Firebase para ambiente: {environment}")
 
     try:
-        if environment == 'production':
-            firebase_creds_b64 = os.environ.get('FIREBASE_CREDENTIALS')
-            db_url = os.environ.get('FIREBASE_URL')
-        else:
-            firebase_creds_b64 = os.environ.get('FIREBASE_CREDENTIALS_HOMOLOG')
-            db_url = os.environ.get('FIREBASE_URL_HOMOLOG')
-
-        if not firebase_creds_b64 or not db_url:
-            raise ValueError("Credenciais ou URL do Firebase não encontradas nas variáveis de ambiente")
-
-        cred_json = decode_base64_credentials(firebase_creds_b64)
+        cred_json, db_url = get_firebase_settings()
         cred = credentials.Certificate(cred_json)
         firebase_app = firebase_admin.initialize_app(cred, {'databaseURL': db_url}, name=environment)
         _firebase_instances[environment] = firebase_app
@@ -40,6 +38,28 @@ def init_firebase():
         raise
 
 
+def init_local_database(environment):
+    logger.warning(f"Utilizando banco de dados local em memória para ambiente: {environment}")
+    if FIREBASE_LOCAL_SEED_FILE:
+        local_database.load_file(FIREBASE_LOCAL_SEED_FILE)
+    _firebase_instances[environment] = local_database
+    return local_database
+
+
+def get_firebase_settings():
+    if get_environment() == 'production':
+        firebase_creds_b64 = os.environ.get('FIREBASE_CREDENTIALS')
+        db_url = os.environ.get('FIREBASE_URL')
+    else:
+        firebase_creds_b64 = os.environ.get('FIREBASE_CREDENTIALS_HOMOLOG')
+        db_url = os.environ.get('FIREBASE_URL_HOMOLOG')
+
+    if not firebase_creds_b64 or not db_url:
+        raise ValueError("Credenciais ou URL do Firebase não encontradas nas variáveis de ambiente")
+
+    return decode_base64_credentials(firebase_creds_b64), db_url
+
+
 def decode_base64_credentials(base64_str):
     try:
         decoded_str = decode_text(base64_str)
@@ -62,18 +82,77 @@ class FirebaseClient:
 
     @staticmethod
     def get_reference(path):
+        if local_database:
+            return local_database.reference(path)
         app = FirebaseClient._get_app()
         return db.reference(path, app=app)
 
     @staticmethod
     def fetch_data(path):
+        if firebase_cache:
+            cached, value = firebase_cache.get(path)
+            if cached:
+                return value
         try:
             ref = FirebaseClient.get_reference(path)
-            return ref.get()
+            data = ref.get()
+            if firebase_cache:
+                firebase_cache.put(path, data)
+            return data
         except Exception as e:
             logger.error(f"Erro ao buscar dados de '{path}': {str(e)}")
             return None
 
+    @staticmethod
+    def fetch_shallow(path):
+        try:
+            ref = FirebaseClient.get_reference(path)
+            return ref.get(shallow=True)
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados rasos de '{path}': {str(e)}")
+            return None
+
+    @staticmethod
+    def fetch_keys(path) -> list:
+        data = FirebaseClient.fetch_shallow(path)
+        return list(data.keys()) if isinstance(data, dict) else []
+
+    @staticmethod
+    def query(path, order_by_child=None, start_at=None, end_at=None, equal_to=None, limit_to_first=None,
+              limit_to_last=None) -> dict:
+        try:
+            ref = FirebaseClient.get_reference(path)
+            query = ref.order_by_child(order_by_child) if order_by_child else ref.order_by_key()
+            if start_at is not None:
+                query = query.start_at(start_at)
+            if end_at is not None:
+                query = query.end_at(end_at)
+            if equal_to is not None:
+                query = query.equal_to(equal_to)
+            if limit_to_first is not None:
+                query = query.limit_to_first(limit_to_first)
+            if limit_to_last is not None:
+                query = query.limit_to_last(limit_to_last)
+            return dict(query.get() or {})
+        except Exception as e:
+            logger.error(f"Erro ao consultar dados de '{path}': {str(e)}")
+            return {}
+
+    @staticmethod
+    def iter_children(path, page_size=100):
+        last_key = None
+        while True:
+            if last_key is None:
+                page = FirebaseClient.query(path, limit_to_first=page_size)
+            else:
+                page = FirebaseClient.query(path, start_at=last_key, limit_to_first=page_size + 1)
+                page.pop(last_key, None)
+            for key, value in page.items():
+                yield key, value
+            if len(page) < page_size:
+                return
+            last_key = next(reversed(page))
+
     @staticmethod
     def save_data(path, data):
         try:
@@ -83,6 +162,8 @@ class FirebaseClient:
         except Exception as e:
             logger.error(f"Erro ao salvar dados em '{path}': {str(e)}")
             return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
 
     @staticmethod
     def update_data(path, updates):
@@ -93,6 +174,8 @@ class FirebaseClient:
         except Exception as e:
             logger.error(f"Erro ao atualizar dados em '{path}': {str(e)}")
             return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
 
     @staticmethod
     def delete_data(path):
@@ -103,6 +186,8 @@ class FirebaseClient:
         except Exception as e:
             logger.error(f"Erro ao excluir dados de '{path}': {str(e)}")
             return False
+        finally:
+            FirebaseClient._invalidate_cache(path)
 
     @staticmethod
     def push_data(path, data):
@@ -114,3 +199,54 @@ class FirebaseClient:
         except Exception as e:
             logger.error(f"Erro ao inserir dados em '{path}': {str(e)}")
             return None
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    def listen(path, callback):
+        try:
+            ref = FirebaseClient.get_reference(path)
+            return ref.listen(callback)
+        except Exception as e:
+            logger.error(f"Erro ao registrar listener em '{path}': {str(e)}")
+            return None
+
+    @staticmethod
+    def multi_update(updates: dict):
+        normalized = {path.strip("/"): value for path, value in updates.items()}
+        if not normalized:
+            return True
+        try:
+            ref = FirebaseClient.get_reference("/")
+            ref.update(normalized)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao atualizar múltiplos caminhos {list(normalized)}: {str(e)}")
+            return False
+        finally:
+            for path in normalized:
+                FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    def server_increment(delta):
+        return {".sv": {"increment": delta}}
+
+    @staticmethod
+    def run_transaction(path, transaction_update):
+        try:
+            ref = FirebaseClient.get_reference(path)
+            return ref.transaction(transaction_update)
+        except Exception as e:
+            logger.error(f"Erro ao executar transação em '{path}': {str(e)}")
+            return None
+        finally:
+            FirebaseClient._invalidate_cache(path)
+
+    @staticmethod
+    def _invalidate_cache(path):
+        if firebase_cache:
+            firebase_cache.invalidate(path)
+
+    @staticmethod
+    def get_cache_stats():
+        return firebase_cache.stats() if firebase_cache else {"enabled": False}
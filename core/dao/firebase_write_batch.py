@@ -0,0 +1,62 @@
+import copy
+import logging
+
+from core.dao.firebase_client import FirebaseClient
+
+logger = logging.getLogger(__name__)
+
+
+class FirebaseWriteBatch:
+
+    def __init__(self):
+        self._updates = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            logger.warning(f"[FirebaseWriteBatch] Descartando {len(self._updates)} escritas por erro: {exc_val}")
+            self._updates.clear()
+        return False
+
+    def save_data(self, path, data):
+        path = path.strip("/")
+        for pending in list(self._updates):
+            if pending.startswith(f"{path}/"):
+                del self._updates[pending]
+        for pending in self._updates:
+            if path.startswith(f"{pending}/"):
+                self._set_nested(pending, path[len(pending) + 1:], data)
+                return
+        self._updates[path] = copy.deepcopy(data)
+
+    def update_data(self, path, updates: dict):
+        for key, value in updates.items():
+            self.save_data(f"{path.strip('/')}/{key.strip('/')}", value)
+
+    def delete_data(self, path):
+        self.save_data(path, None)
+
+    def flush(self):
+        if not self._updates:
+            return True
+        updates, self._updates = self._updates, {}
+        logger.debug(f"[FirebaseWriteBatch] Enviando {len(updates)} escritas: {list(updates)}")
+        return FirebaseClient.multi_update(updates)
+
+    def _set_nested(self, parent_path, relative_path, data):
+        if not isinstance(self._updates[parent_path], dict):
+            self._updates[parent_path] = {}
+        node = self._updates[parent_path]
+        *parents, leaf = relative_path.split("/")
+        for key in parents:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        if data is None:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = copy.deepcopy(data)
@@ -0,0 +1,328 @@
+import copy
+import json
+import logging
+import threading
+import time
+
+from core.dao.push_id import generate_push_id
+
+logger = logging.getLogger(__name__)
+
+
+def _split_path(path: str) -> list:
+    return [segment for segment in (path or "").strip("/").split("/") if segment]
+
+
+def _normalize_value(value):
+    if isinstance(value, (list, tuple)):
+        value = {str(index): item for index, item in enumerate(value)}
+    if isinstance(value, dict):
+        normalized = {}
+        for key, item in value.items():
+            item = _normalize_value(item)
+            if item is not None:
+                normalized[str(key)] = item
+        return normalized or None
+    return value
+
+
+def _to_output(value):
+    if not isinstance(value, dict):
+        return value
+    output = {key: _to_output(item) for key, item in value.items()}
+    if output and all(key.isdigit() for key in output):
+        indexes = [int(key) for key in output]
+        if max(indexes) < 2 * len(indexes):
+            return [output.get(str(index)) for index in range(max(indexes) + 1)]
+    return output
+
+
+def _sort_value(value):
+    if value is None:
+        return 0, 0
+    if value is False:
+        return 1, 0
+    if value is True:
+        return 2, 0
+    if isinstance(value, (int, float)):
+        return 3, value
+    if isinstance(value, str):
+        return 4, value
+    return 5, 0
+
+
+def _sort_key(key: str):
+    if key.lstrip("-").isdigit():
+        return 0, int(key), ""
+    return 1, 0, key
+
+
+class LocalDatabase:
+
+    def __init__(self):
+        self._root = None
+        self._lock = threading.RLock()
+        self._listeners = []
+
+    def load(self, data: dict):
+        with self._lock:
+            self._root = _normalize_value(data)
+
+    def load_file(self, file_path: str):
+        with open(file_path, "r", encoding="utf-8") as file:
+            self.load(json.load(file))
+        logger.debug(f"[LocalDatabase] Dados iniciais carregados de {file_path}")
+
+    def reference(self, path: str = "/"):
+        return LocalReference(self, _split_path(path))
+
+    def get(self, segments: list, shallow: bool = False):
+        with self._lock:
+            node = self._root
+            for segment in segments:
+                if not isinstance(node, dict) or segment not in node:
+                    return None
+                node = node[segment]
+            if shallow and isinstance(node, dict):
+                return {key: True if isinstance(value, dict) else value for key, value in node.items()}
+            return _to_output(copy.deepcopy(node))
+
+    def set(self, segments: list, value):
+        with self._lock:
+            current = self._get_raw(segments)
+            self._set_raw(segments, _normalize_value(self._resolve_server_values(value, current)))
+            self._dispatch(self._build_events([segments]))
+
+    def update(self, segments: list, updates: dict):
+        with self._lock:
+            written = []
+            for key, value in updates.items():
+                child_segments = segments + _split_path(key)
+                current = self._get_raw(child_segments)
+                self._set_raw(child_segments, _normalize_value(self._resolve_server_values(value, current)))
+                written.append(child_segments)
+            self._dispatch(self._build_events(written))
+
+    def transaction(self, segments: list, transaction_update):
+        with self._lock:
+            new_value = transaction_update(self.get(segments))
+            self.set(segments, new_value)
+            return new_value
+
+    def listen(self, segments: list, callback):
+        registration = LocalListenerRegistration(self, segments, callback)
+        with self._lock:
+            self._listeners.append(registration)
+            self._dispatch([(registration, LocalEvent("put", "/", self.get(segments)))])
+        return registration
+
+    def remove_listener(self, registration):
+        with self._lock:
+            if registration in self._listeners:
+                self._listeners.remove(registration)
+
+    def _build_events(self, written_paths: list) -> list:
+        events = []
+        for registration in self._listeners:
+            listened = registration.segments
+            for written in written_paths:
+                if written[:len(listened)] == listened:
+                    relative = written[len(listened):]
+                    events.append((registration, LocalEvent("put", "/" + "/".join(relative), self.get(written))))
+                elif listened[:len(written)] == written:
+                    events.append((registration, LocalEvent("put", "/", self.get(listened))))
+        return events
+
+    def _dispatch(self, events: list):
+        for registration, event in events:
+            try:
+                registration.callback(event)
+            except Exception as e:
+                logger.error(f"[LocalDatabase] Erro no listener de '/{'/'.join(registration.segments)}': {str(e)}")
+
+    def _get_raw(self, segments: list):
+        node = self._root
+        for segment in segments:
+            if not isinstance(node, dict) or segment not in node:
+                return None
+            node = node[segment]
+        return node
+
+    def _set_raw(self, segments: list, value):
+        if not segments:
+            self._root = value
+            return
+        if value is None:
+            self._delete_raw(self._root, segments)
+            if self._root == {}:
+                self._root = None
+            return
+        if not isinstance(self._root, dict):
+            self._root = {}
+        node = self._root
+        for segment in segments[:-1]:
+            if not isinstance(node.get(segment), dict):
+                node[segment] = {}
+            node = node[segment]
+        node[segments[-1]] = value
+
+    def _delete_raw(self, node, segments: list):
+        if not isinstance(node, dict) or segments[0] not in node:
+            return
+        if len(segments) == 1:
+            del node[segments[0]]
+            return
+        child = node[segments[0]]
+        self._delete_raw(child, segments[1:])
+        if child == {}:
+            del node[segments[0]]
+
+    def _resolve_server_values(self, value, current):
+        if isinstance(value, dict):
+            server_value = value.get(".sv")
+            if server_value == "timestamp":
+                return int(time.time() * 1000)
+            if isinstance(server_value, dict) and "increment" in server_value:
+                base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+                return base + server_value["increment"]
+            current_children = current if isinstance(current, dict) else {}
+            return {key: self._resolve_server_values(item, current_children.get(str(key)))
+                    for key, item in value.items()}
+        return value
+
+
+class LocalEvent:
+
+    def __init__(self, event_type: str, path: str, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class LocalListenerRegistration:
+
+    def __init__(self, database: LocalDatabase, segments: list, callback):
+        self._database = database
+        self.segments = segments
+        self.callback = callback
+
+    def close(self):
+        self._database.remove_listener(self)
+
+
+class LocalReference:
+
+    def __init__(self, database: LocalDatabase, segments: list):
+        self._database = database
+        self._segments = segments
+
+    @property
+    def key(self):
+        return self._segments[-1] if self._segments else None
+
+    @property
+    def path(self):
+        return "/" + "/".join(self._segments)
+
+    def child(self, path: str):
+        return LocalReference(self._database, self._segments + _split_path(path))
+
+    def get(self, shallow: bool = False):
+        return self._database.get(self._segments, shallow)
+
+    def set(self, value):
+        self._database.set(self._segments, value)
+
+    def update(self, value: dict):
+        if not isinstance(value, dict) or not value:
+            raise ValueError("Value argument must be a non-empty dictionary.")
+        self._database.update(self._segments, value)
+
+    def delete(self):
+        self._database.set(self._segments, None)
+
+    def push(self, value=""):
+        new_ref = self.child(generate_push_id())
+        new_ref.set(value)
+        return new_ref
+
+    def transaction(self, transaction_update):
+        return self._database.transaction(self._segments, transaction_update)
+
+    def listen(self, callback):
+        return self._database.listen(self._segments, callback)
+
+    def order_by_child(self, path: str):
+        return LocalQuery(self, child_path=_split_path(path))
+
+    def order_by_key(self):
+        return LocalQuery(self)
+
+    def order_by_value(self):
+        return LocalQuery(self, child_path=[])
+
+
+class LocalQuery:
+
+    def __init__(self, reference: LocalReference, child_path: list = None):
+        self._reference = reference
+        self._child_path = child_path
+        self._start_at = None
+        self._end_at = None
+        self._limit_to_first = None
+        self._limit_to_last = None
+
+    def start_at(self, start):
+        self._start_at = start
+        return self
+
+    def end_at(self, end):
+        self._end_at = end
+        return self
+
+    def equal_to(self, value):
+        self._start_at = value
+        self._end_at = value
+        return self
+
+    def limit_to_first(self, limit: int):
+        self._limit_to_first = limit
+        return self
+
+    def limit_to_last(self, limit: int):
+        self._limit_to_last = limit
+        return self
+
+    def get(self):
+        data = self._reference.get()
+        if isinstance(data, list):
+            data = {str(index): item for index, item in enumerate(data) if item is not None}
+        if not isinstance(data, dict):
+            return {}
+
+        items = sorted(data.items(), key=self._order_key)
+        if self._start_at is not None:
+            items = [item for item in items if self._range_key(item) >= self._bound_key(self._start_at)]
+        if self._end_at is not None:
+            items = [item for item in items if self._range_key(item) <= self._bound_key(self._end_at)]
+        if self._limit_to_first is not None:
+            items = items[:self._limit_to_first]
+        if self._limit_to_last is not None:
+            items = items[-self._limit_to_last:] if self._limit_to_last else []
+        return dict(items)
+
+    def _range_key(self, item):
+        key, value = item
+        if self._child_path is None:
+            return _sort_key(key)
+        for segment in self._child_path:
+            value = value.get(segment) if isinstance(value, dict) else None
+        return _sort_value(value)
+
+    def _order_key(self, item):
+        if self._child_path is None:
+            return self._range_key(item)
+        return self._range_key(item) + _sort_key(item[0])
+
+    def _bound_key(self, bound):
+        return _sort_key(str(bound)) if self._child_path is None else _sort_value(bound)
@@ -0,0 +1,49 @@
+import random
+import threading
+import time
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+_lock = threading.Lock()
+_last_push_time = 0
+_last_random_chars = [0] * 12
+
+
+def generate_push_id(now_ms: int = None) -> str:
+    global _last_push_time
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    with _lock:
+        duplicate_time = now_ms == _last_push_time
+        _last_push_time = now_ms
+
+        timestamp_chars = []
+        timestamp = now_ms
+        for _ in range(8):
+            timestamp_chars.append(PUSH_CHARS[timestamp % 64])
+            timestamp //= 64
+        timestamp_chars.reverse()
+
+        if not duplicate_time:
+            for i in range(12):
+                _last_random_chars[i] = random.randint(0, 63)
+        else:
+            i = 11
+            while i >= 0 and _last_random_chars[i] == 63:
+                _last_random_chars[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_random_chars[i] += 1
+
+        return "".join(timestamp_chars) + "".join(PUSH_CHARS[c] for c in _last_random_chars)
+
+
+def get_push_id_timestamp(push_id: str):
+    if not isinstance(push_id, str) or len(push_id) != 20:
+        return None
+    timestamp = 0
+    for char in push_id[:8]:
+        index = PUSH_CHARS.find(char)
+        if index < 0:
+            return None
+        timestamp = timestamp * 64 + index
+    return timestamp
@@ -1,11 +1,11 @@
-import hashlib
 import logging
 import time
 
-from openai import OpenAI
 from openai.types.beta import Assistant
 
 from core.dao.firebase_client import FirebaseClient
+from core.services.assistant_metadata_cache import assistant_metadata_cache
+from core.services.openai_client_registry import OpenaiClientRegistry
 from core.utils.constants import AGENT_LAST_USED_TIMEOUT_SECONDS
 
 logger = logging.getLogger(__name__)
@@ -24,21 +24,27 @@ class AgentService:
 
     @staticmethod
     def get_assistant_by_id(business_phone: str, agent_id: str) -> Assistant:
-        openai_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
         assistant_id = AgentService.get_assistant_id(business_phone, agent_id)
-        client = OpenAI(api_key=openai_key)
+        client = OpenaiClientRegistry.get_client(business_phone)
         assistant = client.beta.assistants.retrieve(assistant_id=assistant_id)
         return assistant
 
     @staticmethod
-    def get_assistant_hash_instructions(business_phone: str, agent_id: str) -> str:
-        assistant_instructions = AgentService.get_assistant_by_id(business_phone, agent_id).instructions
-        hash_prompt = AgentService._hash_prompt(assistant_instructions)
-        return hash_prompt
+    def get_assistant_metadata(business_phone: str, agent_id: str) -> dict:
+        config = AgentService.get_agent_config(business_phone, agent_id) or {}
+        return AgentService.get_assistant_metadata_from_config(business_phone, config)
+
+    @staticmethod
+    def get_assistant_metadata_from_config(business_phone: str, config: dict) -> dict:
+        assistant_id = config.get("assistant_id")
+        if not assistant_id:
+            return None
+        return assistant_metadata_cache.get(business_phone, assistant_id, config.get("assistant_version"))
 
     @staticmethod
-    def _hash_prompt(text: str) -> str:
-        return hashlib.md5(text.strip().encode("utf-8")).hexdigest() if text else ""
+    def get_assistant_hash_instructions(business_phone: str, agent_id: str) -> str:
+        metadata = AgentService.get_assistant_metadata(business_phone, agent_id)
+        return metadata["instructions_hash"] if metadata else ""
 
     @staticmethod
     def get_agent_id(business_phone, user_phone):
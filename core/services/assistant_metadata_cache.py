@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import threading
+import time
+
+from core.services.openai_client_registry import OpenaiClientRegistry
+from core.utils.constants import ASSISTANT_METADATA_TTL_SECONDS, ASSISTANT_METADATA_IDLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def hash_instructions(text: str) -> str:
+    return hashlib.md5(text.strip().encode("utf-8")).hexdigest() if text else ""
+
+
+class AssistantMetadataCache:
+
+    def __init__(self, ttl_seconds: int = ASSISTANT_METADATA_TTL_SECONDS,
+                 idle_seconds: int = ASSISTANT_METADATA_IDLE_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._idle_seconds = idle_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        logger.debug("AssistantMetadataCache iniciado.")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def get(self, business_phone: str, assistant_id: str, version=None) -> dict:
+        key = (assistant_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry["last_used_at"] = time.time()
+                self._hits += 1
+                return entry["metadata"]
+            self._misses += 1
+        return self._load(business_phone, assistant_id, version)
+
+    def invalidate(self, assistant_id: str = None) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if assistant_id is None or key[0] == assistant_id]
+            for key in keys:
+                del self._entries[key]
+        logger.warning(f"[AssistantMetadataCache] {len(keys)} entrada(s) invalidada(s) para {assistant_id or 'todos'}")
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+                "refreshes": self._refreshes
+            }
+
+    def _load(self, business_phone: str, assistant_id: str, version) -> dict:
+        client = OpenaiClientRegistry.get_client(business_phone)
+        assistant = client.beta.assistants.retrieve(assistant_id=assistant_id)
+        metadata = {
+            "name": assistant.name,
+            "instructions": assistant.instructions or "",
+            "instructions_hash": hash_instructions(assistant.instructions),
+            "model": assistant.model,
+            "temperature": assistant.temperature,
+            "top_p": assistant.top_p,
+            "tools": [tool.function.model_dump(exclude_none=True) for tool in assistant.tools if tool.type == "function"]
+        }
+        now = time.time()
+        with self._lock:
+            previous = self._entries.get((assistant_id, version))
+            self._entries[(assistant_id, version)] = {
+                "metadata": metadata,
+                "business_phone": business_phone,
+                "fetched_at": now,
+                "last_used_at": previous["last_used_at"] if previous else now
+            }
+        return metadata
+
+    def _run_loop(self):
+        while not self._stop_event.wait(min(self._ttl_seconds, 60)):
+            try:
+                self._refresh_expired()
+            except Exception as e:
+                logger.error(f"Erro no AssistantMetadataCache: {str(e)}")
+
+    def _refresh_expired(self):
+        now = time.time()
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if now - entry["last_used_at"] > self._idle_seconds]:
+                del self._entries[key]
+            expired = [(key, entry["business_phone"]) for key, entry in self._entries.items()
+                       if now - entry["fetched_at"] >= self._ttl_seconds]
+
+        for (assistant_id, version), business_phone in expired:
+            try:
+                self._load(business_phone, assistant_id, version)
+                with self._lock:
+                    self._refreshes += 1
+            except Exception as e:
+                logger.error(f"[AssistantMetadataCache] Erro ao atualizar assistente {assistant_id}: {str(e)}")
+
+
+assistant_metadata_cache = AssistantMetadataCache()
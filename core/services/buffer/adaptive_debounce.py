@@ -0,0 +1,132 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from core.dao.push_id import get_push_id_timestamp
+from core.utils.constants import BUFFER_DEBOUNCE_MIN_SECONDS, BUFFER_DEBOUNCE_MAX_SECONDS, \
+    BUFFER_DEBOUNCE_FOLLOWUP_WINDOW_SECONDS, BUFFER_DEBOUNCE_HISTORY_SIZE, BUFFER_DEBOUNCE_MAX_TRACKED_USERS, \
+    PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MIN_SAMPLES = 3
+FOLLOWUP_RATIO_THRESHOLD = 0.25
+GAP_PERCENTILE = 0.8
+GAP_MARGIN = 1.25
+
+
+def _percentile(values, percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percentile), len(ordered) - 1)]
+
+
+def _clamp(value: float) -> float:
+    return min(max(value, BUFFER_DEBOUNCE_MIN_SECONDS), BUFFER_DEBOUNCE_MAX_SECONDS)
+
+
+class _UserCadence:
+
+    def __init__(self):
+        self.gaps = deque(maxlen=BUFFER_DEBOUNCE_HISTORY_SIZE)
+        self.typing_delays = deque(maxlen=BUFFER_DEBOUNCE_HISTORY_SIZE)
+        self.followups = deque(maxlen=BUFFER_DEBOUNCE_HISTORY_SIZE)
+        self.last_message_ms = 0
+        self.seen_until_ms = 0
+        self.turn_messages = 0
+        self.last_presence = None
+        self.last_presence_at = 0
+
+
+class AdaptiveDebounce:
+
+    def __init__(self, metrics_window: int = 500):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self._decisions = {"default": 0, "min": 0, "learned": 0, "max": 0}
+        self._recent_waits = deque(maxlen=metrics_window)
+
+    def observe(self, buffer_key: str, buffer: dict):
+        messages = buffer.get("messages") or {}
+        timestamps = sorted(filter(None, map(get_push_id_timestamp, messages))) if isinstance(messages, dict) else []
+        with self._lock:
+            cadence = self._get_cadence(buffer_key)
+            for timestamp in timestamps:
+                if timestamp <= cadence.seen_until_ms:
+                    continue
+                if cadence.last_message_ms:
+                    gap = (timestamp - cadence.last_message_ms) / 1000
+                    is_followup = gap <= BUFFER_DEBOUNCE_FOLLOWUP_WINDOW_SECONDS
+                    cadence.followups.append(is_followup)
+                    if is_followup:
+                        cadence.gaps.append(gap)
+                cadence.last_message_ms = cadence.seen_until_ms = timestamp
+                cadence.turn_messages += 1
+
+            presence = buffer.get("presence")
+            presence_at = buffer.get("presence_last_updated", 0)
+            if presence_at > cadence.last_presence_at:
+                started_typing = presence in ["composing", "recording"] and cadence.last_presence not in [
+                    "composing", "recording"]
+                typing_delay = presence_at - cadence.last_message_ms / 1000
+                if started_typing and cadence.last_message_ms and typing_delay <= BUFFER_DEBOUNCE_FOLLOWUP_WINDOW_SECONDS:
+                    cadence.typing_delays.append(max(typing_delay, 0))
+                cadence.last_presence = presence
+                cadence.last_presence_at = presence_at
+
+    def get_wait(self, buffer_key: str) -> float:
+        with self._lock:
+            return self._decide(self._users.get(buffer_key))[1]
+
+    def record_decision(self, buffer_key: str) -> float:
+        with self._lock:
+            cadence = self._users.get(buffer_key)
+            decision, wait = self._decide(cadence)
+            if cadence:
+                if cadence.turn_messages == 1:
+                    cadence.followups.append(False)
+                cadence.last_message_ms = 0
+                cadence.turn_messages = 0
+                cadence.last_presence = None
+            self._decisions[decision] += 1
+            self._recent_waits.append(wait)
+        logger.debug(f"[AdaptiveDebounce] {buffer_key} -> espera de {wait:.2f}s ({decision})")
+        return wait
+
+    def forget(self, buffer_key: str):
+        with self._lock:
+            self._users.pop(buffer_key, None)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            return {
+                "tracked_users": len(self._users),
+                "min_seconds": BUFFER_DEBOUNCE_MIN_SECONDS,
+                "max_seconds": BUFFER_DEBOUNCE_MAX_SECONDS,
+                "decisions": dict(self._decisions),
+                "wait_seconds_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_seconds_p95": round(_percentile(waits, 0.95), 3) if waits else 0.0
+            }
+
+    def _get_cadence(self, buffer_key: str) -> _UserCadence:
+        cadence = self._users.get(buffer_key)
+        if cadence is None:
+            cadence = self._users[buffer_key] = _UserCadence()
+            while len(self._users) > BUFFER_DEBOUNCE_MAX_TRACKED_USERS:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(buffer_key)
+        return cadence
+
+    @staticmethod
+    def _decide(cadence) -> tuple:
+        if cadence is None or len(cadence.followups) < MIN_SAMPLES:
+            return "default", _clamp(PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS)
+        if sum(cadence.followups) / len(cadence.followups) < FOLLOWUP_RATIO_THRESHOLD:
+            return "min", BUFFER_DEBOUNCE_MIN_SECONDS
+        samples = list(cadence.gaps) + list(cadence.typing_delays)
+        wait = _clamp(_percentile(samples, GAP_PERCENTILE) * GAP_MARGIN)
+        return ("max" if wait >= BUFFER_DEBOUNCE_MAX_SECONDS else "learned"), wait
+
+
+adaptive_debounce = AdaptiveDebounce()
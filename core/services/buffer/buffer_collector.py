@@ -1,98 +1,108 @@
 import logging
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from core.dao.firebase_client import FirebaseClient
+from core.services.buffer.adaptive_debounce import adaptive_debounce
+from core.services.buffer.buffer_mirror import BufferMirror
 from core.services.buffer.buffer_service import BufferService
+from core.services.buffer.buffer_worker_pool import BufferWorkerPool, AsyncBufferWorkerPool
+from core.services.buffer.deadline_scheduler import DeadlineScheduler
+from core.services.buffer.replica_membership import replica_membership
+from core.services.buffer.tenant_policy import tenant_policy
+from core.services.openai_client_registry import OpenaiClientRegistry
 from core.services.process_message_service import ProcessMessageService
+from core.services.step_runner import StepRunner, Blocking
 from core.services.whatsapp_service import WhatsappService
 from core.utils.constants import BUFFER_COLLECTOR_CHECK_INTERVAL_SECONDS, \
     PRESENCE_LAST_UPDATE_BEFORE_FORCE_AVAILABLE_TIMEOUT_SECONDS, \
-    PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS, ZOMBIE_BUFFER_TIMEOUT_SECONDS, REPLICA_ID
+    ZOMBIE_BUFFER_TIMEOUT_SECONDS, \
+    BUFFER_COLLECTOR_MODE, BUFFER_COLLECTOR_MAX_IDLE_SECONDS, ZOMBIE_BUFFER_CHECK_INTERVAL_SECONDS, \
+    BUFFER_WORKER_POOL_SIZE, BUFFER_WORKER_DRAIN_TIMEOUT_SECONDS, BUFFER_MAX_QUEUED_TURNS, BUFFER_SHED_RETRY_SECONDS, \
+    CONVERSATION_PIPELINE, BUFFER_ASYNC_MAX_IN_FLIGHT, BUFFER_ASYNC_BRIDGE_THREADS, BUFFER_SHED_NOTICE_WORKERS
 from core.utils.trace import set_trace_id, reset_trace_id
 
 logger = logging.getLogger(__name__)
 
 
-def _should_ignore_buffer(user_phone: str, buffer: dict, now: int) -> bool:
-    buffer_replica_id = buffer.get("replica_id", "")
-    if REPLICA_ID != buffer_replica_id:
+def _should_ignore_buffer(buffer_key: str, buffer: dict, now: float) -> bool:
+    if not replica_membership.owns(buffer_key):
         return True
     presence = buffer.get("presence")
     presence_age = now - buffer.get("presence_last_updated", 0)
     if presence in ["composing", "recording"]:
         if presence_age < PRESENCE_LAST_UPDATE_BEFORE_FORCE_AVAILABLE_TIMEOUT_SECONDS:
-            logger.debug(f"[Buffer Ignore] Ignorando {presence=} age={presence_age}s")
+            logger.debug(f"[Buffer Ignore] Ignorando {presence=} age={presence_age:.0f}s")
             return True
         else:
             logger.warning(
-                f"[Buffer Force Available] Presença travada ({presence}) há {presence_age}s, forçando disponível")
+                f"[Buffer Force Available] Presença travada ({presence}) há {presence_age:.0f}s, forçando disponível")
             buffer["presence"] = "available"
-            FirebaseClient.save_data(f"message_buffers/{user_phone}", buffer)
-    if presence_age < PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS:
-        logger.debug(f"[Buffer Ignore] Ignorando porque presence age={presence_age}s (esperado >= 5s)")
+            BufferService.update_buffer(buffer_key, {"presence": "available"})
+    wait = adaptive_debounce.get_wait(buffer_key)
+    if presence_age < wait:
+        logger.debug(f"[Buffer Ignore] Ignorando porque presence age={presence_age:.1f}s (esperado >= {wait:.1f}s)")
         return True
-    elif not buffer.get("messages"):
+    elif not BufferService.get_buffer_messages(buffer):
         return True
     return False
 
 
-def _process_buffer(user_phone: str, buffer: dict):
+def _get_processing_deadline(buffer_key: str, buffer: dict) -> float:
+    presence_last_updated = buffer.get("presence_last_updated", 0)
+    if buffer.get("presence") in ["composing", "recording"]:
+        return presence_last_updated + PRESENCE_LAST_UPDATE_BEFORE_FORCE_AVAILABLE_TIMEOUT_SECONDS
+    return presence_last_updated + adaptive_debounce.get_wait(buffer_key)
+
+
+def _process_buffer(buffer_key: str, buffer: dict):
+    token = set_trace_id()
+    try:
+        business_phone, _ = BufferService.split_buffer_key(buffer_key)
+        StepRunner.run(business_phone, _process_buffer_steps(buffer_key, buffer))
+    finally:
+        reset_trace_id(token)
+
+
+async def _process_buffer_async(buffer_key: str, buffer: dict):
     token = set_trace_id()
-    logger.debug(f"[_process_buffer] {user_phone} -> {buffer}")
-    messages = buffer.get("messages", [])
+    try:
+        business_phone, _ = BufferService.split_buffer_key(buffer_key)
+        await StepRunner.run_async(business_phone, _process_buffer_steps(buffer_key, buffer))
+    finally:
+        reset_trace_id(token)
+
+
+def _process_buffer_steps(buffer_key: str, buffer: dict):
+    logger.debug(f"[_process_buffer] {buffer_key} -> {buffer}")
+    messages = BufferService.get_buffer_messages(buffer)
     if not messages:
         return
-    BufferService.clear_buffer(user_phone)
     instance_name = buffer.get("instance_name")
-    business_phone = buffer.get("establishment_phone")
-    WhatsappService.send_typing_signal(instance_name, user_phone)
+    business_phone, user_phone = BufferService.split_buffer_key(buffer_key)
+    yield Blocking(WhatsappService.send_typing_signal, instance_name, user_phone)
 
     full_message = ". ".join(messages).strip()
     logger.debug(f"[Process Buffer] Processando mensagem de {user_phone} -> {instance_name}: {full_message}")
 
-    response_text = ProcessMessageService.process_user_message(business_phone, full_message, user_phone, instance_name)
+    response_text = yield from ProcessMessageService.process_user_message_steps(business_phone, full_message,
+                                                                                user_phone, instance_name)
 
     if response_text:
-        WhatsappService.send_evolution_response(instance_name, user_phone, response_text)
-    reset_trace_id(token)
-
-
-def _check_buffers():
-    logger.debug(f"[_check_buffers] Verificando buffers")
-    now = int(time.time())
-    buffers = BufferService.get_all_buffers()
-
-    for user_phone, buffer in buffers.items():
-        if _should_ignore_buffer(user_phone, buffer, now):
-            continue
-        _process_buffer(user_phone, buffer)
+        yield Blocking(WhatsappService.send_evolution_response, instance_name, user_phone, response_text)
 
 
-def _check_zombie_buffers():
+def _check_zombie_buffers(buffers: dict):
     logger.debug(f"[_check_zombie_buffers] Verificando buffers zumbis...")
     now = int(time.time())
 
-    buffers = BufferService.get_all_buffers()
-
-    for user_phone, buffer in buffers.items():
-        replica_id_last_updated = buffer.get("replica_id_last_updated", 0)
-        replica_id = buffer.get("replica_id", "")
-
-        if now - replica_id_last_updated > ZOMBIE_BUFFER_TIMEOUT_SECONDS or not replica_id:
-            if buffer.get("messages"):
-                logger.warning(
-                    f"[ZOMBIE BUFFER] Buffer zumbi encontrado para {user_phone}. Reassociando à réplica {REPLICA_ID}")
-
-                updates = {
-                    "replica_id": REPLICA_ID,
-                    "last_updated": now,
-                    "replica_id_last_updated": now
-                }
-                BufferService.update_buffer(user_phone, updates)
-            else:
-                BufferService.clear_buffer(user_phone)
-                logger.warning(f"[ZOMBIE BUFFER] Buffer zumbi e sem mensagens encontrado e removido para {user_phone}.")
+    for buffer_key, buffer in buffers.items():
+        if not replica_membership.owns(buffer_key) or BufferService.get_buffer_messages(buffer):
+            continue
+        last_updated = max(buffer.get("last_updated", 0), buffer.get("presence_last_updated", 0))
+        if now - last_updated > ZOMBIE_BUFFER_TIMEOUT_SECONDS:
+            BufferService.clear_buffer_if_empty(buffer_key)
+            logger.warning(f"[ZOMBIE BUFFER] Buffer zumbi e sem mensagens encontrado e removido para {buffer_key}.")
 
 
 class BufferCollector:
@@ -100,20 +110,196 @@ class BufferCollector:
     def __init__(self):
         self._running = False
         self._thread = None
+        self._mirrors = {}
+        self._mirrors_lock = threading.Lock()
+        self._scheduler = DeadlineScheduler()
+        if CONVERSATION_PIPELINE == "async":
+            self._worker_pool = AsyncBufferWorkerPool(BUFFER_ASYNC_MAX_IN_FLIGHT, on_complete=self._on_turn_complete,
+                                                      tenant_policy=tenant_policy.get,
+                                                      max_queued=BUFFER_MAX_QUEUED_TURNS,
+                                                      on_shutdown=OpenaiClientRegistry.aclose,
+                                                      bridge_threads=BUFFER_ASYNC_BRIDGE_THREADS)
+            self._process = _process_buffer_async
+        else:
+            self._worker_pool = BufferWorkerPool(BUFFER_WORKER_POOL_SIZE, on_complete=self._on_turn_complete,
+                                                 tenant_policy=tenant_policy.get, max_queued=BUFFER_MAX_QUEUED_TURNS)
+            self._process = _process_buffer
+        self._shed_count = 0
+        self._shed_until = {}
+        self._shed_notifier = ThreadPoolExecutor(max_workers=BUFFER_SHED_NOTICE_WORKERS,
+                                                 thread_name_prefix="shed-notice")
 
     def start(self):
         time.sleep(1)
         if not self._running:
             self._running = True
-            self._thread = threading.Thread(target=self._run_loop, daemon=False)
+            self._worker_pool.start()
+            BufferService.add_touch_listener(self._arm)
+            replica_membership.add_listener(self._on_shards_change)
+            replica_membership.start()
+            target = self._run_listen_loop if BUFFER_COLLECTOR_MODE == "listen" else self._run_loop
+            self._thread = threading.Thread(target=target, daemon=True)
             self._thread.start()
-            logger.debug("BufferCollector iniciado.")
+            logger.debug(f"BufferCollector iniciado (modo {BUFFER_COLLECTOR_MODE}).")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._scheduler.wake()
+        if self._thread:
+            self._thread.join(BUFFER_COLLECTOR_MAX_IDLE_SECONDS)
+        replica_membership.stop()
+        with self._mirrors_lock:
+            mirrors, self._mirrors = self._mirrors, {}
+        for mirror in mirrors.values():
+            mirror.stop()
+        self._worker_pool.shutdown(BUFFER_WORKER_DRAIN_TIMEOUT_SECONDS)
+        self._shed_notifier.shutdown(wait=False, cancel_futures=True)
+        logger.debug("BufferCollector finalizado.")
+
+    def metrics(self) -> dict:
+        return {
+            "mode": BUFFER_COLLECTOR_MODE,
+            "pipeline": CONVERSATION_PIPELINE,
+            "scheduled": len(self._scheduler),
+            "replicas": replica_membership.members(),
+            "shards": sorted(replica_membership.owned_shards()),
+            "debounce": adaptive_debounce.metrics(),
+            "shed": self._shed_count,
+            "workers": self._worker_pool.metrics()
+        }
+
+    def _arm(self, buffer_key: str, buffer: dict):
+        if not buffer or not replica_membership.owns(buffer_key):
+            self._shed_until.pop(buffer_key, None)
+            self._scheduler.cancel(buffer_key)
+            return
+        adaptive_debounce.observe(buffer_key, buffer)
+        if BufferService.get_buffer_messages(buffer):
+            deadline = _get_processing_deadline(buffer_key, buffer)
+            self._scheduler.arm(buffer_key, max(deadline, self._shed_until.get(buffer_key, 0)))
+        else:
+            self._shed_until.pop(buffer_key, None)
+            self._scheduler.cancel(buffer_key)
+
+    def _get_mirror(self, buffer_key: str):
+        with self._mirrors_lock:
+            return self._mirrors.get(BufferService.get_shard(buffer_key))
+
+    def _get_buffer(self, buffer_key: str):
+        if BUFFER_COLLECTOR_MODE != "listen":
+            return BufferService.get_buffer(buffer_key)
+        mirror = self._get_mirror(buffer_key)
+        return mirror.get(buffer_key) if mirror else None
+
+    def _snapshot(self) -> dict:
+        with self._mirrors_lock:
+            mirrors = list(self._mirrors.values())
+        buffers = {}
+        for mirror in mirrors:
+            buffers.update(mirror.snapshot())
+        return buffers
+
+    def _on_shards_change(self, shards: set):
+        if not self._running:
+            return
+        if BUFFER_COLLECTOR_MODE != "listen":
+            for buffer_key, buffer in BufferService.get_all_buffers(sorted(shards)).items():
+                self._arm(buffer_key, buffer)
+            self._scheduler.wake()
+            return
+
+        with self._mirrors_lock:
+            released = {shard: mirror for shard, mirror in self._mirrors.items() if shard not in shards}
+            claimed = [shard for shard in shards if shard not in self._mirrors]
+            for shard in released:
+                del self._mirrors[shard]
+        for mirror in released.values():
+            mirror.stop()
+            for buffer_key in mirror.snapshot():
+                self._scheduler.cancel(buffer_key)
+        for shard in claimed:
+            mirror = BufferMirror(f"message_buffers/{shard}", on_change=self._arm)
+            with self._mirrors_lock:
+                self._mirrors[shard] = mirror
+            try:
+                mirror.start()
+            except RuntimeError as e:
+                logger.error(f"[BufferCollector] Erro ao espelhar shard {shard}: {str(e)}")
+                with self._mirrors_lock:
+                    self._mirrors.pop(shard, None)
+        self._scheduler.wake()
+
+    def _on_turn_complete(self, buffer_key: str):
+        if self._running:
+            self._arm(buffer_key, self._get_buffer(buffer_key))
+
+    def _fire_due_buffers(self):
+        for buffer_key in self._scheduler.pop_due(time.time()):
+            self._shed_until.pop(buffer_key, None)
+            if self._worker_pool.is_busy(buffer_key):
+                logger.debug(f"[BufferCollector] Turno de {buffer_key} em andamento, aguardando conclusão")
+                continue
+            buffer = self._get_buffer(buffer_key)
+            if not buffer:
+                continue
+            if _should_ignore_buffer(buffer_key, buffer, time.time()):
+                self._arm(buffer_key, buffer)
+                continue
+            business_phone, _ = BufferService.split_buffer_key(buffer_key)
+            if self._worker_pool.is_overloaded(business_phone):
+                self._shed(buffer_key, buffer)
+                continue
+            if not self._worker_pool.submit(buffer_key, lambda key=buffer_key, data=buffer: self._process(key, data),
+                                            tenant=business_phone):
+                continue
+            adaptive_debounce.record_decision(buffer_key)
+            message_keys = [key for key, _ in BufferService.get_buffer_message_items(buffer)]
+            mirror = self._get_mirror(buffer_key)
+            if mirror:
+                mirror.discard_messages(buffer_key, message_keys)
+            BufferService.consume_buffer_messages(buffer_key, message_keys)
+
+    def _shed(self, buffer_key: str, buffer: dict):
+        self._shed_count += 1
+        self._shed_until[buffer_key] = time.time() + BUFFER_SHED_RETRY_SECONDS
+        business_phone, user_phone = BufferService.split_buffer_key(buffer_key)
+        logger.warning(f"[BufferCollector] Fila de {business_phone} cheia, adiando turno de {user_phone}")
+        if not buffer.get("overload_notified"):
+            message = tenant_policy.get(business_phone)["overload_message"]
+            self._shed_notifier.submit(WhatsappService.send_evolution_response, buffer.get("instance_name"),
+                                       user_phone, message)
+            BufferService.update_buffer(buffer_key, {"overload_notified": True})
+        self._scheduler.arm(buffer_key, self._shed_until[buffer_key])
+
+    def _run_listen_loop(self):
+        last_zombie_check = 0
+        while self._running:
+            try:
+                self._fire_due_buffers()
+                if time.time() - last_zombie_check >= ZOMBIE_BUFFER_CHECK_INTERVAL_SECONDS:
+                    self._on_shards_change(replica_membership.owned_shards())
+                    _check_zombie_buffers(self._snapshot())
+                    last_zombie_check = time.time()
+            except Exception as e:
+                logger.error(f"Erro no BufferCollector: {str(e)}")
+            self._scheduler.wait(max_timeout=BUFFER_COLLECTOR_MAX_IDLE_SECONDS)
 
     def _run_loop(self):
+        last_scan = 0
         while self._running:
             try:
-                _check_buffers()
-                _check_zombie_buffers()
+                if time.time() - last_scan >= BUFFER_COLLECTOR_CHECK_INTERVAL_SECONDS:
+                    buffers = BufferService.get_all_buffers(sorted(replica_membership.owned_shards()))
+                    for buffer_key, buffer in buffers.items():
+                        self._arm(buffer_key, buffer)
+                    _check_zombie_buffers(buffers)
+                    last_scan = time.time()
+                self._fire_due_buffers()
             except Exception as e:
                 logger.error(f"Erro no BufferCollector: {str(e)}")
-            time.sleep(BUFFER_COLLECTOR_CHECK_INTERVAL_SECONDS)
+            self._scheduler.wait(max_timeout=max(last_scan + BUFFER_COLLECTOR_CHECK_INTERVAL_SECONDS - time.time(), 0))
+
+
+buffer_collector = BufferCollector()
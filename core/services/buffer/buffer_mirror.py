@@ -0,0 +1,95 @@
+import copy
+import logging
+import threading
+
+from core.dao.firebase_client import FirebaseClient
+
+logger = logging.getLogger(__name__)
+
+
+def _set_nested(node, segments: list, value):
+    key, rest = segments[0], segments[1:]
+    if isinstance(node, list):
+        node = {str(index): item for index, item in enumerate(node) if item is not None}
+    if rest:
+        child = node.get(key)
+        child = _set_nested(child if isinstance(child, (dict, list)) else {}, rest, value)
+        if child:
+            node[key] = child
+        else:
+            node.pop(key, None)
+    elif value is None:
+        node.pop(key, None)
+    else:
+        node[key] = value
+    return node
+
+
+class BufferMirror:
+
+    def __init__(self, path: str, on_change=None):
+        self._path = path
+        self._on_change = on_change
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._registration = None
+
+    def start(self):
+        self._registration = FirebaseClient.listen(self._path, self._handle_event)
+        if not self._registration:
+            raise RuntimeError(f"Não foi possível escutar '{self._path}'")
+        logger.debug(f"[BufferMirror] Escutando alterações em '{self._path}'")
+
+    def stop(self):
+        if self._registration:
+            self._registration.close()
+            self._registration = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return copy.deepcopy(self._buffers)
+
+    def get(self, user_phone: str):
+        with self._lock:
+            return copy.deepcopy(self._buffers.get(user_phone))
+
+    def discard_messages(self, user_phone: str, message_keys: list):
+        with self._lock:
+            for key in message_keys:
+                self._apply_put([user_phone, "messages", key], None)
+
+    def _handle_event(self, event):
+        segments = [segment for segment in (event.path or "").split("/") if segment]
+        with self._lock:
+            if event.event_type == "patch":
+                changed = set()
+                for key, value in (event.data or {}).items():
+                    changed |= self._apply_put(segments + [part for part in key.split("/") if part], value)
+            else:
+                changed = self._apply_put(segments, event.data)
+            changes = {key: copy.deepcopy(self._buffers.get(key)) for key in changed}
+
+        if self._on_change:
+            for user_phone, buffer in changes.items():
+                self._on_change(user_phone, buffer)
+
+    def _apply_put(self, segments: list, data) -> set:
+        if not segments:
+            changed = set(self._buffers) | set(data or {})
+            self._buffers = {key: value for key, value in (data or {}).items() if isinstance(value, dict)}
+            return changed
+
+        user_phone = segments[0]
+        if len(segments) == 1:
+            if isinstance(data, dict):
+                self._buffers[user_phone] = data
+            else:
+                self._buffers.pop(user_phone, None)
+            return {user_phone}
+
+        buffer = _set_nested(self._buffers.get(user_phone, {}), segments[1:], data)
+        if buffer:
+            self._buffers[user_phone] = buffer
+        else:
+            self._buffers.pop(user_phone, None)
+        return {user_phone}
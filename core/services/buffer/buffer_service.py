@@ -1,63 +1,146 @@
+import hashlib
 import logging
 import time
 
 from core.dao.firebase_client import FirebaseClient
-from core.utils.constants import REPLICA_ID
+from core.dao.firebase_write_batch import FirebaseWriteBatch
+from core.dao.push_id import generate_push_id
+from core.utils.constants import BUFFER_SHARD_COUNT
 
 logger = logging.getLogger(__name__)
+_touch_listeners = []
 
 
 class BufferService:
 
+    @staticmethod
+    def add_touch_listener(callback):
+        _touch_listeners.append(callback)
+
+    @staticmethod
+    def _notify_touch(buffer_key: str, buffer: dict):
+        for callback in _touch_listeners:
+            try:
+                callback(buffer_key, buffer)
+            except Exception as e:
+                logger.error(f"[BufferService] Erro ao notificar alteração do buffer de {buffer_key}: {str(e)}")
+
+    @staticmethod
+    def get_buffer_key(business_phone: str, user_phone: str) -> str:
+        return f"{business_phone}_{user_phone}"
+
+    @staticmethod
+    def split_buffer_key(buffer_key: str) -> tuple:
+        business_phone, _, user_phone = buffer_key.partition("_")
+        return business_phone, user_phone
+
+    @staticmethod
+    def get_shard_id(index: int) -> str:
+        return f"shard_{index:03d}"
+
+    @staticmethod
+    def get_shard(buffer_key: str) -> str:
+        digest = hashlib.md5(buffer_key.encode("utf-8")).digest()
+        return BufferService.get_shard_id(int.from_bytes(digest[:4], "big") % BUFFER_SHARD_COUNT)
+
+    @staticmethod
+    def get_all_shards() -> list:
+        return [BufferService.get_shard_id(index) for index in range(BUFFER_SHARD_COUNT)]
+
+    @staticmethod
+    def get_buffer_path(buffer_key: str) -> str:
+        return f"message_buffers/{BufferService.get_shard(buffer_key)}/{buffer_key}"
+
     @staticmethod
     def add_to_buffer(business_phone: str, user_phone: str, message: str, instance_name: str):
-        logger.debug(f"[add_to_buffer] {instance_name} -> {user_phone} -> {message}")
-        path = f"message_buffers/{user_phone}"
-        data = FirebaseClient.fetch_data(path) or {}
-        now = int(time.time())
+        BufferService.add_messages_to_buffer(business_phone, user_phone, [message], instance_name)
 
-        messages = data.get("messages", [])
-        messages.append(message)
+    @staticmethod
+    def add_messages_to_buffer(business_phone: str, user_phone: str, new_messages: list, instance_name: str,
+                               batch: FirebaseWriteBatch = None):
+        logger.debug(f"[add_messages_to_buffer] {instance_name} -> {user_phone} -> {new_messages}")
+        buffer_key = BufferService.get_buffer_key(business_phone, user_phone)
+        path = BufferService.get_buffer_path(buffer_key)
+        now = round(time.time(), 3)
+        messages = {generate_push_id(): message for message in new_messages}
 
-        updates = {
+        metadata = {
             "establishment_phone": business_phone,
-            "messages": messages,
             "last_updated": now,
             "presence": "available",
             "presence_last_updated": now,
             "instance_name": instance_name
         }
-        if "replica_id" not in data or not data.get("replica_id"):
-            updates["replica_id"] = REPLICA_ID
-            updates["replica_id_last_updated"] = now
+        updates = {**metadata, **{f"messages/{key}": message for key, message in messages.items()}}
 
-        FirebaseClient.update_data(path, updates)
+        if batch:
+            batch.update_data(path, updates)
+        else:
+            FirebaseClient.update_data(path, updates)
+        BufferService._notify_touch(buffer_key, {**metadata, "messages": messages})
 
     @staticmethod
-    def update_presence_to_buffer(user_phone: str, presence: str):
-        logger.debug(f"[update_presence_to_buffer] {user_phone} -> {presence}")
-        data = FirebaseClient.fetch_data(f"message_buffers/{user_phone}") or {}
-        now = int(time.time())
+    def update_presence_to_buffer(business_phone: str, user_phone: str, presence: str, buffer: dict):
+        logger.debug(f"[update_presence_to_buffer] {business_phone} -> {user_phone} -> {presence}")
+        buffer_key = BufferService.get_buffer_key(business_phone, user_phone)
+        now = round(time.time(), 3)
         updates = {
             "presence": presence,
             "presence_last_updated": now
         }
-        if "replica_id" not in data or not data.get("replica_id"):
-            updates["replica_id"] = REPLICA_ID
-            updates["replica_id_last_updated"] = now
-        BufferService.update_buffer(user_phone, updates)
+        BufferService.update_buffer(buffer_key, updates)
+        BufferService._notify_touch(buffer_key, {**buffer, **updates})
+
+    @staticmethod
+    def clear_buffer_if_empty(buffer_key: str):
+        def clear(current):
+            if isinstance(current, dict) and BufferService.get_buffer_messages(current):
+                return current
+            return None
+
+        logger.debug(f"[clear_buffer_if_empty] {buffer_key}")
+        FirebaseClient.run_transaction(BufferService.get_buffer_path(buffer_key), clear)
+
+    @staticmethod
+    def consume_buffer_messages(buffer_key: str, message_keys: list):
+        logger.debug(f"[consume_buffer_messages] {buffer_key} -> {message_keys}")
+        if message_keys:
+            updates = {f"messages/{key}": None for key in message_keys}
+            BufferService.update_buffer(buffer_key, {**updates, "overload_notified": None})
+
+    @staticmethod
+    def get_buffer(buffer_key: str):
+        return FirebaseClient.fetch_data(BufferService.get_buffer_path(buffer_key))
+
+    @staticmethod
+    def get_establishment_buffer_paths(business_phone: str) -> list:
+        prefix = BufferService.get_buffer_key(business_phone, "")
+        paths = []
+        for shard in BufferService.get_all_shards():
+            buffers = FirebaseClient.query(f"message_buffers/{shard}", start_at=prefix, end_at=f"{prefix}\uf8ff")
+            paths.extend(f"message_buffers/{shard}/{buffer_key}" for buffer_key in buffers)
+        return paths
+
+    @staticmethod
+    def get_all_buffers(shards: list = None):
+        logger.debug(f"[get_all_buffers] {shards}")
+        buffers = {}
+        for shard in BufferService.get_all_shards() if shards is None else shards:
+            buffers.update(FirebaseClient.fetch_data(f"message_buffers/{shard}") or {})
+        return buffers
 
     @staticmethod
-    def clear_buffer(user_phone: str):
-        logger.debug(f"[clear_buffer] {user_phone}")
-        FirebaseClient.delete_data(f"message_buffers/{user_phone}")
+    def get_buffer_message_items(buffer: dict) -> list:
+        messages = buffer.get("messages") or []
+        if isinstance(messages, list):
+            return [(str(index), message) for index, message in enumerate(messages) if message is not None]
+        ordered_keys = sorted(messages, key=lambda key: (0, int(key)) if key.isdigit() else (1, key))
+        return [(key, messages[key]) for key in ordered_keys if messages[key] is not None]
 
     @staticmethod
-    def get_all_buffers():
-        logger.debug("[get_all_buffers]")
-        return FirebaseClient.fetch_data("message_buffers") or {}
+    def get_buffer_messages(buffer: dict) -> list:
+        return [message for _, message in BufferService.get_buffer_message_items(buffer)]
 
     @staticmethod
-    def update_buffer(user_phone: str, updates: dict):
-        path = f"message_buffers/{user_phone}"
-        FirebaseClient.update_data(path, updates)
+    def update_buffer(buffer_key: str, updates: dict):
+        FirebaseClient.update_data(BufferService.get_buffer_path(buffer_key), updates)
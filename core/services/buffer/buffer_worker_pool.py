@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {"weight": 1, "max_in_flight": None, "max_queued": None}
+
+
+class _TenantQueue:
+
+    def __init__(self):
+        self.items = deque()
+        self.running = 0
+        self.last_finish = 0.0
+        self.policy = DEFAULT_POLICY
+
+
+class BufferWorkerPool:
+
+    def __init__(self, size: int, on_complete=None, tenant_policy=None, max_queued: int = None,
+                 metrics_window: int = 500):
+        self._size = size
+        self._on_complete = on_complete
+        self._tenant_policy = tenant_policy
+        self._max_queued = max_queued
+        self._tenants = {}
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._busy_keys = set()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._accepting = False
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_times = deque(maxlen=metrics_window)
+        self._run_times = deque(maxlen=metrics_window)
+
+    def start(self):
+        with self._condition:
+            if self._accepting:
+                return
+            self._accepting = True
+        for index in range(self._size):
+            thread = threading.Thread(target=self._worker_loop, name=f"buffer-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.debug(f"BufferWorkerPool iniciado com {self._size} workers.")
+
+    def is_busy(self, key: str) -> bool:
+        with self._condition:
+            return key in self._busy_keys
+
+    def is_overloaded(self, tenant: str = None) -> bool:
+        tenant = tenant or ""
+        policy = self._get_policy(tenant)
+        with self._condition:
+            if self._max_queued and self._queued >= self._max_queued:
+                return True
+            state = self._tenants.get(tenant)
+            return bool(state and policy["max_queued"] and len(state.items) >= policy["max_queued"])
+
+    def submit(self, key: str, task, tenant: str = None) -> bool:
+        tenant = tenant or ""
+        policy = self._get_policy(tenant)
+        with self._condition:
+            if not self._accepting or key in self._busy_keys:
+                return False
+            state = self._tenants.setdefault(tenant, _TenantQueue())
+            state.policy = policy
+            start_tag = max(self._virtual_time, state.last_finish)
+            state.last_finish = start_tag + 1 / policy["weight"]
+            state.items.append((key, task, time.monotonic(), start_tag, state.last_finish))
+            self._busy_keys.add(key)
+            self._queued += 1
+            self._wake_workers()
+            return True
+
+    def shutdown(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._accepting = False
+            self._wake_workers(notify_all=True)
+            while (self._queued or self._in_flight) and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+            pending = self._queued + self._in_flight
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        if pending:
+            logger.warning(f"[BufferWorkerPool] Encerrado com {pending} turno(s) ainda pendente(s)")
+        else:
+            logger.debug("[BufferWorkerPool] Encerrado sem turnos pendentes")
+
+    def metrics(self) -> dict:
+        with self._condition:
+            wait_times = sorted(self._wait_times)
+            run_times = sorted(self._run_times)
+            return {
+                "workers": self._size,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "tenants": {
+                    tenant: {
+                        "queued": len(state.items),
+                        "in_flight": state.running,
+                        "weight": state.policy["weight"],
+                        "max_in_flight": state.policy["max_in_flight"]
+                    } for tenant, state in self._tenants.items()
+                },
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_seconds_avg": round(sum(wait_times) / len(wait_times), 3) if wait_times else 0.0,
+                "wait_seconds_p95": round(wait_times[int(len(wait_times) * 0.95)], 3) if wait_times else 0.0,
+                "wait_seconds_max": round(wait_times[-1], 3) if wait_times else 0.0,
+                "run_seconds_avg": round(sum(run_times) / len(run_times), 3) if run_times else 0.0,
+                "run_seconds_p95": round(run_times[int(len(run_times) * 0.95)], 3) if run_times else 0.0
+            }
+
+    def _get_policy(self, tenant: str) -> dict:
+        if not self._tenant_policy:
+            return DEFAULT_POLICY
+        try:
+            return self._tenant_policy(tenant)
+        except Exception as e:
+            logger.error(f"[BufferWorkerPool] Erro ao obter política do tenant {tenant}: {str(e)}")
+            return DEFAULT_POLICY
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                item = self._take_next()
+                while item is None and (self._queued or self._accepting):
+                    self._condition.wait()
+                    item = self._take_next()
+            if item is None:
+                return
+            _, key, task = item
+            started_at = time.monotonic()
+            failed = False
+            try:
+                task()
+            except Exception as e:
+                failed = True
+                logger.error(f"[BufferWorkerPool] Erro ao processar turno de {key}: {str(e)}")
+            self._finish(item, started_at, failed)
+            self._notify_complete(key)
+
+    def _take_next(self):
+        with self._condition:
+            tenant = self._next_tenant()
+            if tenant is None:
+                return None
+            state = self._tenants[tenant]
+            key, task, enqueued_at, start_tag, _ = state.items.popleft()
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._queued -= 1
+            self._in_flight += 1
+            state.running += 1
+            self._wait_times.append(time.monotonic() - enqueued_at)
+            return tenant, key, task
+
+    def _finish(self, item, started_at: float, failed: bool):
+        tenant, key, _ = item
+        with self._condition:
+            state = self._tenants[tenant]
+            self._in_flight -= 1
+            self._busy_keys.discard(key)
+            state.running -= 1
+            if not state.running and not state.items:
+                self._tenants.pop(tenant, None)
+            self._run_times.append(time.monotonic() - started_at)
+            self._completed += 1
+            self._failed += 1 if failed else 0
+            self._wake_workers(notify_all=True)
+
+    def _notify_complete(self, key: str):
+        if self._on_complete:
+            try:
+                self._on_complete(key)
+            except Exception as e:
+                logger.error(f"[BufferWorkerPool] Erro no callback de conclusão de {key}: {str(e)}")
+
+    def _wake_workers(self, notify_all: bool = False):
+        if notify_all:
+            self._condition.notify_all()
+        else:
+            self._condition.notify()
+
+    def _next_tenant(self):
+        selected, selected_finish = None, None
+        for tenant, state in self._tenants.items():
+            if not state.items:
+                continue
+            max_in_flight = state.policy["max_in_flight"]
+            if max_in_flight and state.running >= max_in_flight:
+                continue
+            finish_tag = state.items[0][4]
+            if selected_finish is None or finish_tag < selected_finish:
+                selected, selected_finish = tenant, finish_tag
+        return selected
+
+
+class AsyncBufferWorkerPool(BufferWorkerPool):
+
+    def __init__(self, size: int, on_complete=None, tenant_policy=None, max_queued: int = None,
+                 metrics_window: int = 500, on_shutdown=None, bridge_threads: int = 32):
+        super().__init__(size, on_complete, tenant_policy, max_queued, metrics_window)
+        self._on_shutdown = on_shutdown
+        self._bridge_threads = bridge_threads
+        self._loop = None
+        self._wakeup = None
+
+    def start(self):
+        with self._condition:
+            if self._accepting:
+                return
+            self._accepting = True
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(max_workers=self._bridge_threads,
+                                                           thread_name_prefix="buffer-async-bridge"))
+        thread = threading.Thread(target=self._run_loop, name="buffer-async-workers", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.debug(f"AsyncBufferWorkerPool iniciado com até {self._size} turnos simultâneos.")
+
+    def _run_loop(self):
+        try:
+            self._loop.run_until_complete(self._run_workers())
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+        finally:
+            self._loop.close()
+
+    async def _run_workers(self):
+        self._wakeup = asyncio.Event()
+        await asyncio.gather(*[self._async_worker_loop() for _ in range(self._size)])
+        if self._on_shutdown:
+            try:
+                await self._on_shutdown()
+            except Exception as e:
+                logger.error(f"[AsyncBufferWorkerPool] Erro ao encerrar recursos assíncronos: {str(e)}")
+
+    async def _async_worker_loop(self):
+        while True:
+            item = self._take_next()
+            if item is None:
+                with self._condition:
+                    if not self._queued and not self._accepting:
+                        return
+                self._wakeup.clear()
+                item = self._take_next()
+                if item is None:
+                    await self._wakeup.wait()
+                    continue
+            _, key, task = item
+            started_at = time.monotonic()
+            failed = False
+            try:
+                await task()
+            except Exception as e:
+                failed = True
+                logger.error(f"[AsyncBufferWorkerPool] Erro ao processar turno de {key}: {str(e)}")
+            self._finish(item, started_at, failed)
+            await asyncio.to_thread(self._notify_complete, key)
+
+    def _wake_workers(self, notify_all: bool = False):
+        super()._wake_workers(notify_all)
+        if self._loop and self._wakeup and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
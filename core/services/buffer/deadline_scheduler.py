@@ -0,0 +1,55 @@
+import heapq
+import threading
+import time
+
+
+class DeadlineScheduler:
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+        self._condition = threading.Condition()
+
+    def arm(self, key: str, due: float):
+        with self._condition:
+            if self._deadlines.get(key) == due:
+                return
+            self._deadlines[key] = due
+            heapq.heappush(self._heap, (due, key))
+            if self._heap[0] == (due, key):
+                self._condition.notify_all()
+
+    def cancel(self, key: str):
+        with self._condition:
+            self._deadlines.pop(key, None)
+
+    def pop_due(self, now: float) -> list:
+        due_keys = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                due, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == due:
+                    del self._deadlines[key]
+                    due_keys.append(key)
+        return due_keys
+
+    def wait(self, max_timeout: float):
+        with self._condition:
+            self._discard_stale()
+            timeout = max_timeout
+            if self._heap:
+                timeout = min(max(self._heap[0][0] - time.time(), 0), max_timeout)
+            if timeout > 0:
+                self._condition.wait(timeout)
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._deadlines)
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
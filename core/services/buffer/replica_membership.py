@@ -0,0 +1,199 @@
+import bisect
+import hashlib
+import logging
+import threading
+import time
+
+from core.dao.firebase_client import FirebaseClient
+from core.services.buffer.buffer_service import BufferService
+from core.utils.constants import REPLICA_ID, REPLICA_HEARTBEAT_INTERVAL_SECONDS, REPLICA_HEARTBEAT_TIMEOUT_SECONDS, \
+    HASH_RING_VIRTUAL_NODES, BUFFER_SHARD_LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+
+    def __init__(self, members: list, virtual_nodes: int):
+        self.members = sorted(members)
+        points = sorted((_hash(f"{member}#{index}"), member)
+                        for member in self.members for index in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class ReplicaMembership:
+
+    def __init__(self, replica_id: str):
+        self._replica_id = replica_id
+        self._ring = HashRing([replica_id], HASH_RING_VIRTUAL_NODES)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._leases = {}
+        self._owned_shards = set()
+        self._started_at = int(time.time())
+        self._server_offset = 0.0
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._heartbeat()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        logger.debug(f"ReplicaMembership iniciado para réplica {self._replica_id}.")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for shard in list(self._leases):
+            self._release_lease(shard)
+        self._leases = {}
+        self._update_owned_shards()
+        FirebaseClient.delete_data(f"replicas/{self._replica_id}")
+        logger.debug(f"ReplicaMembership finalizado para réplica {self._replica_id}.")
+
+    def owns(self, buffer_key: str) -> bool:
+        return BufferService.get_shard(buffer_key) in self.owned_shards()
+
+    def owned_shards(self) -> set:
+        with self._lock:
+            now = time.time()
+            return {shard for shard in self._owned_shards if self._leases.get(shard, 0) > now}
+
+    def members(self) -> list:
+        with self._lock:
+            return list(self._ring.members)
+
+    def _run_loop(self):
+        while not self._stop_event.wait(REPLICA_HEARTBEAT_INTERVAL_SECONDS):
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.error(f"Erro no ReplicaMembership: {str(e)}")
+
+    def _heartbeat(self):
+        FirebaseClient.update_data(f"replicas/{self._replica_id}", {
+            "last_heartbeat": {".sv": "timestamp"},
+            "started_at": self._started_at
+        })
+        replicas = FirebaseClient.fetch_data("replicas")
+        own = replicas.get(self._replica_id) if isinstance(replicas, dict) else None
+        if isinstance(own, dict) and isinstance(own.get("last_heartbeat"), int):
+            self._server_offset = own["last_heartbeat"] / 1000 - time.time()
+            self._update_members(replicas, own["last_heartbeat"])
+        else:
+            logger.warning(f"[ReplicaMembership] Falha ao ler réplicas, mantendo membros {self.members()}")
+
+        with self._lock:
+            ring = self._ring
+            held = {shard for shard, expires_at in self._leases.items() if expires_at > time.time()}
+
+        for shard in BufferService.get_all_shards():
+            if ring.owner(shard) != self._replica_id:
+                if shard in self._leases:
+                    self._release_lease(shard)
+            elif shard not in held:
+                self._claim_lease(shard)
+        self._renew_leases({shard for shard in held if ring.owner(shard) == self._replica_id})
+        self._update_owned_shards()
+
+    def _update_members(self, replicas: dict, server_now_ms: int):
+        timeout_ms = REPLICA_HEARTBEAT_TIMEOUT_SECONDS * 1000
+        alive, expired = [], []
+        for replica_id, info in replicas.items():
+            if isinstance(info, dict) and server_now_ms - info.get("last_heartbeat", 0) <= timeout_ms:
+                alive.append(replica_id)
+            elif replica_id != self._replica_id:
+                expired.append(replica_id)
+        if self._replica_id not in alive:
+            alive.append(self._replica_id)
+        if expired:
+            logger.warning(f"[ReplicaMembership] Removendo heartbeats expirados: {sorted(expired)}")
+            FirebaseClient.multi_update({f"replicas/{replica_id}": None for replica_id in expired})
+
+        with self._lock:
+            if sorted(alive) != self._ring.members:
+                logger.warning(f"[ReplicaMembership] Membros alterados: {self._ring.members} -> {sorted(alive)}")
+                self._ring = HashRing(alive, HASH_RING_VIRTUAL_NODES)
+
+    def _server_now_ms(self) -> int:
+        return int((time.time() + self._server_offset) * 1000)
+
+    def _renew_leases(self, shards: set):
+        now = time.time()
+        with self._lock:
+            due = any(self._leases[shard] - now < BUFFER_SHARD_LEASE_SECONDS / 2 for shard in shards)
+        if not due:
+            return
+        renewed = FirebaseClient.multi_update({f"buffer_shard_leases/{shard}/renewed_at": {".sv": "timestamp"}
+                                               for shard in shards})
+        if renewed:
+            with self._lock:
+                for shard in shards:
+                    if shard in self._leases:
+                        self._leases[shard] = now + BUFFER_SHARD_LEASE_SECONDS
+
+    def _claim_lease(self, shard: str):
+        expires_at = time.time() + BUFFER_SHARD_LEASE_SECONDS
+        server_now_ms = self._server_now_ms()
+        lease_ms = BUFFER_SHARD_LEASE_SECONDS * 1000
+
+        def claim(current):
+            if current and current.get("replica_id") != self._replica_id \
+                    and server_now_ms - current.get("renewed_at", 0) < lease_ms:
+                return current
+            return {"replica_id": self._replica_id, "renewed_at": {".sv": "timestamp"}}
+
+        lease = FirebaseClient.run_transaction(f"buffer_shard_leases/{shard}", claim)
+        with self._lock:
+            if lease and lease.get("replica_id") == self._replica_id:
+                self._leases[shard] = expires_at
+            elif lease:
+                self._leases.pop(shard, None)
+
+    def _release_lease(self, shard: str):
+        with self._lock:
+            self._leases.pop(shard, None)
+
+        def release(current):
+            if current and current.get("replica_id") == self._replica_id:
+                return None
+            return current
+
+        FirebaseClient.run_transaction(f"buffer_shard_leases/{shard}", release)
+
+    def _update_owned_shards(self):
+        with self._lock:
+            now = time.time()
+            owned = {shard for shard, expires_at in self._leases.items() if expires_at > now}
+            if owned == self._owned_shards:
+                return
+            logger.warning(f"[ReplicaMembership] Shards da réplica {self._replica_id}: {sorted(owned)}")
+            self._owned_shards = owned
+
+        for callback in self._listeners:
+            try:
+                callback(owned)
+            except Exception as e:
+                logger.error(f"[ReplicaMembership] Erro ao notificar alteração de shards: {str(e)}")
+
+
+replica_membership = ReplicaMembership(REPLICA_ID)
@@ -0,0 +1,56 @@
+import logging
+import threading
+import time
+
+from core.dao.firebase_client import FirebaseClient
+from core.utils.constants import BUFFER_TENANT_MAX_IN_FLIGHT, BUFFER_TENANT_MAX_QUEUED, BUFFER_TENANT_DEFAULT_WEIGHT, \
+    BUFFER_OVERLOAD_MESSAGE, BUFFER_TENANT_POLICY_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class TenantPolicy:
+
+    def __init__(self, ttl_seconds: int = BUFFER_TENANT_POLICY_TTL_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._policies = {}
+        self._lock = threading.Lock()
+
+    def get(self, business_phone: str) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._policies.get(business_phone)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        config = {}
+        if business_phone:
+            config = FirebaseClient.fetch_data(f"establishments/{business_phone}/config") or {}
+        policy = {
+            "weight": self._positive(config.get("scheduling_weight"), BUFFER_TENANT_DEFAULT_WEIGHT),
+            "max_in_flight": int(self._positive(config.get("max_concurrent_turns"), BUFFER_TENANT_MAX_IN_FLIGHT)),
+            "max_queued": int(self._positive(config.get("max_queued_turns"), BUFFER_TENANT_MAX_QUEUED)),
+            "overload_message": config.get("overload_message") or BUFFER_OVERLOAD_MESSAGE
+        }
+        with self._lock:
+            self._policies[business_phone] = (now + self._ttl_seconds, policy)
+        return policy
+
+    def invalidate(self, business_phone: str = None) -> int:
+        with self._lock:
+            keys = [key for key in self._policies if business_phone is None or key == business_phone]
+            for key in keys:
+                del self._policies[key]
+        logger.warning(f"[TenantPolicy] {len(keys)} política(s) invalidada(s) para {business_phone or 'todos'}")
+        return len(keys)
+
+    @staticmethod
+    def _positive(value, default):
+        try:
+            return float(value) if value is not None and float(value) > 0 else default
+        except (TypeError, ValueError):
+            logger.warning(f"[TenantPolicy] Valor inválido na configuração: {value}")
+            return default
+
+
+tenant_policy = TenantPolicy()
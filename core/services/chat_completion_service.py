@@ -0,0 +1,157 @@
+import logging
+import time
+
+import openai
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from core.dao.firebase_client import FirebaseClient
+from core.services.agent_service import AgentService
+from core.services.step_runner import Blocking, ApiStream, ResolveTools, Sleep
+from core.services.usage_tracker_service import UsageTrackerService
+from core.utils.constants import CHAT_HISTORY_WINDOW, CHAT_MAX_TOOL_ROUNDS, OPENAI_TURN_DEADLINE_SECONDS, \
+    OPENAI_RUN_MAX_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+USER_HISTORY_ROLE = "[Usuário]"
+
+
+class ChatCompletionService:
+
+    @staticmethod
+    def get_ai_response_steps(business_phone: str, user_msg: str, user_phone: str, agent_config: dict, context: str,
+                              instance_name: str):
+        request = yield Blocking(ChatCompletionService._build_request, business_phone, user_msg, user_phone,
+                                 agent_config, context)
+        deadline = time.monotonic() + OPENAI_TURN_DEADLINE_SECONDS
+        for _ in range(CHAT_MAX_TOOL_ROUNDS):
+            state = yield from ChatCompletionService._stream_completion_steps(request, deadline)
+            if state["usage"]:
+                yield Blocking(UsageTrackerService.update_token_usage, establishment_id=business_phone,
+                               input_tokens=state["usage"].prompt_tokens,
+                               output_tokens=state["usage"].completion_tokens)
+            if not state["tool_calls"]:
+                return ChatCompletionService._finish(state["content_parts"])
+            tool_calls = ChatCompletionService._build_tool_calls(state["tool_calls"])
+            tool_outputs = yield ResolveTools(business_phone, user_phone, instance_name, tool_calls,
+                                              time.time() + deadline - time.monotonic())
+            ChatCompletionService._append_tool_round(request["messages"], state["content_parts"], tool_calls,
+                                                     tool_outputs)
+        raise Exception(f"[ChatCompletionService] Limite de {CHAT_MAX_TOOL_ROUNDS} rodadas de tools atingido")
+
+    @staticmethod
+    def classify_error(error: Exception) -> str:
+        if isinstance(error, openai.RateLimitError):
+            return "invalid" if getattr(error, "code", None) == "insufficient_quota" else "rate_limit"
+        if isinstance(error, openai.APIConnectionError):
+            return "server_error"
+        if isinstance(error, openai.APIStatusError) and error.status_code >= 500:
+            return "server_error"
+        return "invalid"
+
+    @staticmethod
+    def _stream_completion_steps(request: dict, deadline: float):
+        from core.services.openai_service import OpenaiService, RETRYABLE_RUN_ERRORS
+        for attempt in range(OPENAI_RUN_MAX_ATTEMPTS):
+            if time.monotonic() >= deadline:
+                raise Exception("[ChatCompletionService] Prazo do turno esgotado")
+            state = {"content_parts": [], "tool_calls": {}, "usage": None}
+            try:
+                yield ApiStream("chat.completions.create",
+                                lambda chunk: ChatCompletionService._consume_chunk(chunk, state, deadline),
+                                timeout=OpenaiService.get_request_timeout(deadline), **request)
+                return state
+            except Exception as e:
+                error_type = ChatCompletionService.classify_error(e)
+                delay = OpenaiService.get_retry_delay(error_type, attempt)
+                if error_type not in RETRYABLE_RUN_ERRORS or attempt + 1 == OPENAI_RUN_MAX_ATTEMPTS \
+                        or time.monotonic() + delay >= deadline:
+                    raise
+                logger.warning(f"[ChatCompletionService] Falha na requisição ({error_type}), nova tentativa em "
+                               f"{delay:.1f}s: {str(e)}")
+                yield Sleep(delay)
+
+    @staticmethod
+    def _build_request(business_phone: str, user_msg: str, user_phone: str, agent_config: dict, context: str) -> dict:
+        metadata = AgentService.get_assistant_metadata_from_config(business_phone, agent_config) or {}
+        instructions = agent_config.get("instructions") or metadata.get("instructions", "")
+        history = FirebaseClient.fetch_data(f"establishments/{business_phone}/users/{user_phone}/conversations") or []
+        messages = [{"role": "system", "content": f"{instructions}\n\n{context}".strip()}]
+        messages.extend(ChatCompletionService._build_history(history))
+        messages.append({"role": "user", "content": user_msg})
+
+        request = {
+            "model": agent_config.get("model") or metadata.get("model"),
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        for field in ["temperature", "top_p"]:
+            if metadata.get(field) is not None:
+                request[field] = metadata[field]
+        if metadata.get("tools"):
+            request["tools"] = [{"type": "function", "function": tool} for tool in metadata["tools"]]
+        return request
+
+    @staticmethod
+    def _build_history(history) -> list:
+        if isinstance(history, dict):
+            history = [value for _, value in sorted(history.items(), key=lambda item: (len(item[0]), item[0]))]
+        elif not isinstance(history, list):
+            logger.warning(f"[ChatCompletionService] Histórico de conversa em formato inesperado: {type(history)}")
+            history = []
+        window = [entry for entry in history if isinstance(entry, dict) and entry.get("content")]
+        while window and window[-1].get("role") == USER_HISTORY_ROLE:
+            window.pop()
+        messages = []
+        for entry in window[-CHAT_HISTORY_WINDOW:]:
+            if entry.get("role") == USER_HISTORY_ROLE:
+                messages.append({"role": "user", "content": entry["content"]})
+            else:
+                messages.append({"role": "assistant", "content": entry["content"]})
+        return messages
+
+    @staticmethod
+    def _consume_chunk(chunk, state: dict, deadline: float):
+        if time.monotonic() >= deadline:
+            raise Exception("[ChatCompletionService] Prazo do turno esgotado durante o stream")
+        if chunk.usage:
+            state["usage"] = chunk.usage
+        if not chunk.choices:
+            return
+        delta = chunk.choices[0].delta
+        if delta.content:
+            state["content_parts"].append(delta.content)
+        for tool_call in delta.tool_calls or []:
+            current = state["tool_calls"].setdefault(tool_call.index, {"id": "", "name": "", "arguments": ""})
+            if tool_call.id:
+                current["id"] = tool_call.id
+            if tool_call.function and tool_call.function.name:
+                current["name"] += tool_call.function.name
+            if tool_call.function and tool_call.function.arguments:
+                current["arguments"] += tool_call.function.arguments
+
+    @staticmethod
+    def _build_tool_calls(tool_calls: dict) -> list:
+        return [
+            ChatCompletionMessageToolCall(id=call["id"], type="function",
+                                          function={"name": call["name"], "arguments": call["arguments"]})
+            for _, call in sorted(tool_calls.items())
+        ]
+
+    @staticmethod
+    def _append_tool_round(messages: list, content_parts: list, tool_calls: list, tool_outputs: list):
+        messages.append({
+            "role": "assistant",
+            "content": "".join(content_parts) or None,
+            "tool_calls": [tool_call.model_dump() for tool_call in tool_calls]
+        })
+        for tool_output in tool_outputs:
+            messages.append({"role": "tool", "tool_call_id": tool_output["tool_call_id"],
+                             "content": tool_output["output"]})
+
+    @staticmethod
+    def _finish(content_parts: list) -> str:
+        response = "".join(content_parts)
+        logger.debug(f"[AI] Resposta gerada: {response}")
+        return response
@@ -3,8 +3,6 @@ import logging
 import os
 from typing import List, Dict
 
-from openai import OpenAI
-
 from core.dao.firebase_client import FirebaseClient
 from core.services.agent_service import AgentService
 from core.utils.constants import CONVERSATION_HISTORY_LIMIT
@@ -39,15 +37,9 @@ class ConversationHistoryService:
 
         if role == "assistant":
             if agent_id:
-                config = AgentService.get_agent_config(business_phone, agent_id)
-                if config:
-                    assistant_id = config.get("assistant_id")
-                    if assistant_id:
-                        openai_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
-                        client = OpenAI(api_key=openai_key)
-                        assistant_info = client.beta.assistants.retrieve(assistant_id=assistant_id)
-                        if assistant_info and assistant_info.name:
-                            return f"[{assistant_info.name}]"
+                metadata = AgentService.get_assistant_metadata(business_phone, agent_id)
+                if metadata and metadata.get("name"):
+                    return f"[{metadata['name']}]"
             return "[Agente]"
 
         return role
@@ -50,8 +50,11 @@ class IncomingService:
 
     @staticmethod
     def _handle_reset_context(incoming):
-        FirebaseClient.delete_data(f"establishments/{incoming.business_phone}/users/{incoming.user_phone}")
-        FirebaseClient.delete_data(f"message_buffers/{incoming.user_phone}")
+        buffer_key = BufferService.get_buffer_key(incoming.business_phone, incoming.user_phone)
+        FirebaseClient.multi_update({
+            f"establishments/{incoming.business_phone}/users/{incoming.user_phone}": None,
+            BufferService.get_buffer_path(buffer_key): None
+        })
         logger.warning(f"Context has been reset: {incoming.user_identification}")
         WhatsappService.send_evolution_response(incoming.instance_name, incoming.user_phone,
                                                 "Contexto resetado com sucesso.")
@@ -0,0 +1,134 @@
+import logging
+import threading
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient, AsyncOpenAI, DefaultAsyncHttpxClient
+
+from core.dao.firebase_client import FirebaseClient
+from core.services.openai_rate_limiter import openai_rate_limiter
+from core.utils.constants import OPENAI_TIMEOUT_SECONDS, OPENAI_CONNECT_TIMEOUT_SECONDS, OPENAI_MAX_RETRIES, \
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+_clients = {}
+_async_clients = {}
+_establishment_keys = {}
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [openai_rate_limiter.before_request],
+                         "response": [openai_rate_limiter.after_response]}
+        )
+    return _http_client
+
+
+def _get_async_http_client():
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS),
+            timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [openai_rate_limiter.before_request_async],
+                         "response": [openai_rate_limiter.after_response_async]}
+        )
+    return _async_http_client
+
+
+class OpenaiClientRegistry:
+
+    @staticmethod
+    def get_client(business_phone: str) -> OpenAI:
+        return OpenaiClientRegistry.get_client_for_key(OpenaiClientRegistry._resolve_key(business_phone))
+
+    @staticmethod
+    def get_async_client(business_phone: str) -> AsyncOpenAI:
+        api_key = OpenaiClientRegistry._resolve_key(business_phone)
+        with _lock:
+            client = _async_clients.get(api_key)
+            if client is None:
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=_get_async_http_client()
+                )
+                _async_clients[api_key] = client
+            return client
+
+    @staticmethod
+    def get_client_for_key(api_key: str) -> OpenAI:
+        with _lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=_get_http_client()
+                )
+                _clients[api_key] = client
+            return client
+
+    @staticmethod
+    def evict(business_phone: str) -> bool:
+        FirebaseClient._invalidate_cache(f"establishments/{business_phone}/openai_key")
+        with _lock:
+            api_key = _establishment_keys.pop(business_phone, None)
+            if api_key:
+                OpenaiClientRegistry._evict_unused(api_key)
+        logger.warning(f"[OpenaiClientRegistry] Cliente OpenAI de {business_phone} descartado")
+        return api_key is not None
+
+    @staticmethod
+    def _resolve_key(business_phone: str) -> str:
+        api_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
+        with _lock:
+            previous_key = _establishment_keys.get(business_phone)
+            _establishment_keys[business_phone] = api_key
+            if previous_key and previous_key != api_key:
+                logger.warning(f"[OpenaiClientRegistry] Chave OpenAI de {business_phone} alterada, descartando cliente")
+                OpenaiClientRegistry._evict_unused(previous_key)
+        return api_key
+
+    @staticmethod
+    def _evict_unused(api_key: str):
+        if api_key not in _establishment_keys.values():
+            _clients.pop(api_key, None)
+            _async_clients.pop(api_key, None)
+            openai_rate_limiter.forget(api_key)
+
+    @staticmethod
+    def stats() -> dict:
+        with _lock:
+            return {"clients": len(_clients), "async_clients": len(_async_clients),
+                    "establishments": len(_establishment_keys)}
+
+    @staticmethod
+    def close():
+        global _http_client
+        with _lock:
+            _clients.clear()
+            _establishment_keys.clear()
+            if _http_client is not None:
+                _http_client.close()
+                _http_client = None
+
+    @staticmethod
+    async def aclose():
+        global _async_http_client
+        with _lock:
+            _async_clients.clear()
+            http_client, _async_http_client = _async_http_client, None
+        if http_client is not None:
+            await http_client.aclose()
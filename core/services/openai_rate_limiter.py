@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from core.utils.constants import OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS, OPENAI_RATE_LIMIT_TOKEN_RESERVE
+
+logger = logging.getLogger(__name__)
+
+RESET_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+RESET_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+DEFAULT_WINDOW_SECONDS = 60
+CHARS_PER_TOKEN = 4
+
+
+def _parse_reset(value) -> float:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = RESET_PATTERN.findall(value)
+        return sum(float(amount) * RESET_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def _parse_int(value):
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _Bucket:
+
+    def __init__(self):
+        self.limit = None
+        self.level = None
+        self.rate = None
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        if self.limit is not None:
+            self.level = min(self.limit, self.level + self.rate * (now - self.updated_at))
+        self.updated_at = now
+
+    def update(self, limit: int, remaining: int, reset_seconds: float, now: float):
+        self.limit = limit if limit is not None else max(self.limit or 0, remaining)
+        self.level = remaining
+        if reset_seconds and self.limit > remaining:
+            self.rate = (self.limit - remaining) / reset_seconds
+        else:
+            self.rate = self.limit / DEFAULT_WINDOW_SECONDS
+        self.updated_at = now
+
+    def exhaust(self, reset_seconds: float, now: float):
+        if self.limit is None:
+            return
+        self.level = 0
+        self.rate = self.limit / reset_seconds if reset_seconds else self.limit / DEFAULT_WINDOW_SECONDS
+        self.updated_at = now
+
+    def wait_for(self, amount: float) -> float:
+        if self.limit is None or self.level >= amount or not self.rate:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def saturation(self) -> float:
+        if not self.limit:
+            return 0.0
+        return round(min(max(1 - self.level / self.limit, 0.0), 1.0), 4)
+
+
+class _KeyState:
+
+    def __init__(self):
+        self.requests = _Bucket()
+        self.tokens = _Bucket()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+
+
+class OpenaiRateLimiter:
+
+    def __init__(self, max_wait_seconds: float = OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS,
+                 token_reserve: int = OPENAI_RATE_LIMIT_TOKEN_RESERVE):
+        self._max_wait_seconds = max_wait_seconds
+        self._token_reserve = token_reserve
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, request):
+        wait = self._reserve(request)
+        if wait:
+            time.sleep(wait)
+
+    def after_response(self, response):
+        self._observe(response)
+
+    async def before_request_async(self, request):
+        wait = self._reserve(request)
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def after_response_async(self, response):
+        self._observe(response)
+
+    def forget(self, api_key: str):
+        key = self._fingerprint(api_key or "")
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for key, state in self._keys.items():
+                state.requests.refill(now)
+                state.tokens.refill(now)
+                result[key] = {
+                    "requests_limit": state.requests.limit,
+                    "requests_remaining": int(state.requests.level) if state.requests.limit is not None else None,
+                    "requests_saturation": state.requests.saturation(),
+                    "tokens_limit": state.tokens.limit,
+                    "tokens_remaining": int(state.tokens.level) if state.tokens.limit is not None else None,
+                    "tokens_saturation": state.tokens.saturation(),
+                    "waits": state.waits,
+                    "wait_seconds_total": round(state.wait_seconds, 3),
+                    "throttled_responses": state.throttled
+                }
+            return result
+
+    def _reserve(self, request) -> float:
+        key = self._get_key(request)
+        if not key:
+            return 0.0
+        with self._lock:
+            state = self._keys.setdefault(key, _KeyState())
+            now = time.monotonic()
+            state.requests.refill(now)
+            state.tokens.refill(now)
+            wait = state.requests.wait_for(1)
+            if request.method == "POST":
+                tokens = self._estimate_tokens(request)
+                wait = max(wait, state.tokens.wait_for(tokens))
+                if state.tokens.limit is not None:
+                    state.tokens.level -= tokens
+            wait = min(wait, self._max_wait_seconds)
+            if state.requests.limit is not None:
+                state.requests.level -= 1
+            if wait:
+                state.waits += 1
+                state.wait_seconds += wait
+        if wait:
+            logger.debug(f"[OpenaiRateLimiter] Aguardando {wait:.2f}s para respeitar o limite da chave {key}")
+        return wait
+
+    def _observe(self, response):
+        key = self._get_key(response.request)
+        if not key:
+            return
+        headers = response.headers
+        with self._lock:
+            state = self._keys.setdefault(key, _KeyState())
+            now = time.monotonic()
+            for bucket, name in [(state.requests, "requests"), (state.tokens, "tokens")]:
+                remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{name}"))
+                if remaining is not None:
+                    bucket.update(_parse_int(headers.get(f"x-ratelimit-limit-{name}")), remaining,
+                                  _parse_reset(headers.get(f"x-ratelimit-reset-{name}")), now)
+            if response.status_code == 429:
+                state.throttled += 1
+                retry_after = _parse_reset(headers.get("retry-after"))
+                state.requests.exhaust(retry_after, now)
+        if response.status_code == 429:
+            logger.warning(f"[OpenaiRateLimiter] Limite de requisições atingido para a chave {key}")
+
+    def _estimate_tokens(self, request) -> int:
+        try:
+            prompt_tokens = len(request.content) // CHARS_PER_TOKEN
+        except Exception:
+            prompt_tokens = 0
+        return prompt_tokens + self._token_reserve
+
+    @staticmethod
+    def _get_key(request) -> str:
+        authorization = request.headers.get("authorization", "")
+        return OpenaiRateLimiter._fingerprint(authorization.removeprefix("Bearer ").strip())
+
+    @staticmethod
+    def _fingerprint(api_key: str) -> str:
+        if len(api_key) <= 8:
+            return None
+        return f"...{api_key[-4:]}-{hashlib.md5(api_key.encode('utf-8')).hexdigest()[:6]}"
+
+
+openai_rate_limiter = OpenaiRateLimiter()
@@ -1,34 +1,150 @@
 import logging
+import random
 import time
 
-from openai import OpenAI
-
-from core.dao.firebase_client import FirebaseClient
 from core.services.agent_service import AgentService
+from core.services.chat_completion_service import ChatCompletionService
+from core.services.step_runner import StepRunner, Blocking, ApiCall, ApiStream, Sleep, ResolveTools
 from core.services.thread_service import ThreadService
-from core.services.tool_handler import ToolHandler
+from core.utils.constants import OPENAI_RUN_MODE, OPENAI_INLINE_RUN_MESSAGES, OPENAI_TRUNCATION_LAST_MESSAGES, \
+    OPENAI_MAX_PROMPT_TOKENS, CHAT_COMPLETIONS_ENGINE, OPENAI_TURN_DEADLINE_SECONDS, OPENAI_POLL_INITIAL_SECONDS, \
+    OPENAI_POLL_MAX_SECONDS, OPENAI_POLL_BACKOFF_FACTOR, OPENAI_RUN_MAX_ATTEMPTS, OPENAI_RETRY_BASE_SECONDS, \
+    OPENAI_RETRY_MAX_SECONDS, OPENAI_CANCEL_GRACE_SECONDS, OPENAI_TIMEOUT_SECONDS, OPENAI_CONNECT_TIMEOUT_SECONDS
 from core.utils.date_utils import get_today_formated
 
 logger = logging.getLogger(__name__)
 
+RUN_FINAL_EVENTS = ["thread.run.requires_action", "thread.run.completed", "thread.run.incomplete",
+                    "thread.run.failed", "thread.run.cancelled", "thread.run.expired"]
+RUN_MESSAGES_PAGE_SIZE = 100
+RUN_TERMINAL_STATUSES = ["completed", "failed", "cancelled", "expired", "incomplete"]
+RETRYABLE_RUN_ERRORS = ["rate_limit", "server_error"]
+ACTIVE_RUN_STATUSES = ["queued", "in_progress", "requires_action"]
+ACTIVE_RUNS_LIMIT = 5
+
 
 class OpenaiService:
 
     @staticmethod
     def get_ai_response(business_phone: str, user_msg: str, user_phone: str, agent_id: str, instance_name: str) -> str:
+        return StepRunner.run(business_phone, OpenaiService.get_ai_response_steps(business_phone, user_msg,
+                                                                                  user_phone, agent_id,
+                                                                                  instance_name))
+
+    @staticmethod
+    def get_ai_response_steps(business_phone: str, user_msg: str, user_phone: str, agent_id: str, instance_name: str):
         logger.debug(
             f"[get_ai_response] {user_phone} -> {user_msg} -> {agent_id}")
-        thread_id = ThreadService.get_thread_id(business_phone, user_phone, agent_id)
-        api_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
-        client = OpenAI(api_key=api_key)
+        context = OpenaiService.build_context(business_phone, user_phone)
+        agent_config = (yield Blocking(AgentService.get_agent_config, business_phone, agent_id)) or {}
+        if agent_config.get("engine") == CHAT_COMPLETIONS_ENGINE:
+            return (yield from ChatCompletionService.get_ai_response_steps(business_phone, user_msg, user_phone,
+                                                                           agent_config, context, instance_name))
+        thread_id = yield Blocking(ThreadService.get_thread_id, business_phone, user_phone, agent_id)
+        assistant_id = agent_config.get("assistant_id")
+
+        run_options = OpenaiService.get_run_options(agent_config, context, user_msg)
+        if not OPENAI_INLINE_RUN_MESSAGES:
+            yield ApiCall("beta.threads.messages.create", thread_id=thread_id, role="user", content=context)
+            yield ApiCall("beta.threads.messages.create", thread_id=thread_id, role="user", content=user_msg)
+
+        run, streamed_response = yield from OpenaiService.execute_run_steps(assistant_id, business_phone,
+                                                                            instance_name, thread_id, user_phone,
+                                                                            run_options=run_options)
+        yield Blocking(OpenaiService.record_usage, business_phone, run)
+
+        if streamed_response is not None:
+            logger.debug(f"[AI] Resposta gerada: {streamed_response}")
+            return streamed_response
+
+        messages = yield from OpenaiService._list_run_messages(thread_id, run.id)
+        replies = [OpenaiService.get_message_text(msg) for msg in messages if msg.role == "assistant"]
+        if replies:
+            final_response = "\n".join(replies)
+            logger.debug(f"[AI] Resposta gerada: {final_response}")
+            return final_response
+        logger.warning(f"[AI] Run {run.id} concluída sem mensagem do assistente -> {thread_id}")
+        return ""
+
+    @staticmethod
+    def execute_run_steps(assistant_id, business_phone, instance_name, thread_id, user_phone, run_options=None,
+                          deadline=None):
+        run_options = run_options or {}
+        deadline = deadline or time.monotonic() + OPENAI_TURN_DEADLINE_SECONDS
+        for attempt in range(OPENAI_RUN_MAX_ATTEMPTS):
+            if OPENAI_RUN_MODE == "stream":
+                run, response = yield from OpenaiService._stream_run_steps(assistant_id, business_phone,
+                                                                           instance_name, thread_id, user_phone,
+                                                                           run_options, deadline)
+            else:
+                run = yield ApiCall("beta.threads.runs.create", thread_id=thread_id, assistant_id=assistant_id,
+                                    **run_options)
+                run = yield from OpenaiService._wait_for_run_steps(run, business_phone, instance_name, thread_id,
+                                                                   user_phone, deadline)
+                response = None
+            if run.status not in ["failed", "cancelled", "expired"]:
+                return run, response
+            error_type = OpenaiService.classify_run_error(run)
+            delay = OpenaiService.get_retry_delay(error_type, attempt)
+            logger.warning(f"[AI] Run {run.id} terminou como {run.status} ({error_type}): {run.last_error}")
+            if error_type not in RETRYABLE_RUN_ERRORS or attempt + 1 == OPENAI_RUN_MAX_ATTEMPTS \
+                    or time.monotonic() + delay >= deadline:
+                break
+            yield Sleep(delay)
+            if run.id:
+                run_options = {key: value for key, value in run_options.items() if key != "additional_messages"}
+        logger.error(f"[execute_run] {instance_name} -> {user_phone} -> {thread_id}. ERRO na execução da run.")
+        raise Exception(f"[execute_run] Run {run.id} falhou após {attempt + 1} tentativa(s) ({error_type})")
+
+    @staticmethod
+    def classify_run_error(run) -> str:
+        if run.status == "cancelled":
+            return "cancelled"
+        if run.status == "expired":
+            return "server_error"
+        code = run.last_error.code if run.last_error else None
+        if code == "rate_limit_exceeded":
+            return "invalid" if "quota" in (run.last_error.message or "").lower() else "rate_limit"
+        if code == "server_error":
+            return "server_error"
+        return "invalid"
+
+    @staticmethod
+    def get_retry_delay(error_type: str, attempt: int) -> float:
+        base = OPENAI_RETRY_BASE_SECONDS * (2 if error_type == "rate_limit" else 1)
+        delay = min(OPENAI_RETRY_MAX_SECONDS, base * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def get_next_poll_interval(interval: float) -> float:
+        return min(interval * OPENAI_POLL_BACKOFF_FACTOR, OPENAI_POLL_MAX_SECONDS)
+
+    @staticmethod
+    def get_request_timeout(deadline: float) -> float:
+        return max(min(deadline - time.monotonic(), OPENAI_TIMEOUT_SECONDS), OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def build_context(business_phone: str, user_phone: str) -> str:
         user_phone_context = "" if user_phone == business_phone else f"O número do telefone do usuário é {user_phone}."
-        context = f"⚠️ CONTEXTO AUXILIAR: Hoje é {get_today_formated()}\n{user_phone_context}"
-        client.beta.threads.messages.create(thread_id=thread_id, role="user", content=context)
-        client.beta.threads.messages.create(thread_id=thread_id, role="user", content=user_msg)
+        return f"⚠️ CONTEXTO AUXILIAR: Hoje é {get_today_formated()}\n{user_phone_context}"
 
-        assistant_id = AgentService.get_assistant_id(business_phone, agent_id)
+    @staticmethod
+    def get_run_options(agent_config: dict, context: str, user_msg: str) -> dict:
+        last_messages = OpenaiService._get_int_option(agent_config, "truncation_last_messages",
+                                                      OPENAI_TRUNCATION_LAST_MESSAGES)
+        max_prompt_tokens = OpenaiService._get_int_option(agent_config, "max_prompt_tokens", OPENAI_MAX_PROMPT_TOKENS)
+        run_options = {}
+        if OPENAI_INLINE_RUN_MESSAGES:
+            run_options["additional_instructions"] = context
+            run_options["additional_messages"] = [{"role": "user", "content": user_msg}]
+        if last_messages > 0:
+            run_options["truncation_strategy"] = {"type": "last_messages", "last_messages": last_messages}
+        if max_prompt_tokens > 0:
+            run_options["max_prompt_tokens"] = max_prompt_tokens
+        return run_options
 
-        run = OpenaiService.execute_run(assistant_id, business_phone, client, instance_name, thread_id, user_phone)
+    @staticmethod
+    def record_usage(business_phone: str, run):
         usage = run.usage
         if usage:
             from core.services.usage_tracker_service import UsageTrackerService
@@ -38,44 +154,121 @@ class OpenaiService:
                 output_tokens=usage.completion_tokens
             )
 
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        for msg in messages.data:
-            if msg.role == "assistant":
-                final_response = msg.content[0].text.value
-                logger.debug(f"[AI] Resposta gerada: {final_response}")
-                return final_response
-        return ""
+    @staticmethod
+    def get_message_text(message) -> str:
+        return "\n".join(part.text.value for part in message.content if part.type == "text")
+
+    @staticmethod
+    def _stream_run_steps(assistant_id, business_phone, instance_name, thread_id, user_phone, run_options, deadline):
+        state = {"run": None, "final_run": None, "replies": []}
+        tool_outputs = {}
+        on_event = lambda event: OpenaiService._on_stream_event(state, event, deadline)
+        stream = ApiStream("beta.threads.runs.stream", on_event, thread_id=thread_id, assistant_id=assistant_id,
+                           timeout=OpenaiService.get_request_timeout(deadline), **run_options)
+        try:
+            while True:
+                state["final_run"] = None
+                yield stream
+                final_run = state["final_run"]
+                if final_run is None:
+                    raise Exception("Stream da run encerrado sem status final")
+                logger.debug(f"[run.status] {final_run.status}")
+                if final_run.status != "requires_action":
+                    completed = final_run.status == "completed" and state["replies"]
+                    return final_run, "\n".join(state["replies"]) if completed else None
+                outputs = yield from OpenaiService._resolve_tool_calls(final_run, business_phone, user_phone,
+                                                                       instance_name, tool_outputs)
+                stream = ApiStream("beta.threads.runs.submit_tool_outputs_stream", on_event, thread_id=thread_id,
+                                   run_id=final_run.id, tool_outputs=outputs,
+                                   timeout=OpenaiService.get_request_timeout(deadline))
+        except Exception as e:
+            run = state["run"]
+            if run is None:
+                logger.warning(f"[execute_run] Falha no stream antes da criação da run, usando polling: {str(e)}")
+                run = yield from OpenaiService._find_active_run(thread_id)
+                if run is None:
+                    if time.monotonic() >= deadline:
+                        raise Exception("Prazo do turno esgotado antes da criação da run") from e
+                    run = yield ApiCall("beta.threads.runs.create", thread_id=thread_id, assistant_id=assistant_id,
+                                        timeout=OpenaiService.get_request_timeout(deadline), **run_options)
+                else:
+                    logger.warning(f"[execute_run] Run ativa {run.id} encontrada na thread, acompanhando por polling")
+            else:
+                logger.warning(f"[execute_run] Falha no stream da run {run.id}, usando polling: {str(e)}")
+                run = yield ApiCall("beta.threads.runs.retrieve", thread_id=thread_id, run_id=run.id)
+            run = yield from OpenaiService._wait_for_run_steps(run, business_phone, instance_name, thread_id,
+                                                               user_phone, deadline, tool_outputs)
+            return run, None
+
+    @staticmethod
+    def _list_run_messages(thread_id, run_id):
+        messages, after = [], None
+        while True:
+            page = yield ApiCall("beta.threads.messages.list", thread_id=thread_id, run_id=run_id, order="asc",
+                                 limit=RUN_MESSAGES_PAGE_SIZE, **({"after": after} if after else {}))
+            messages.extend(page.data)
+            if not page.has_more or not page.data:
+                return messages
+            after = page.data[-1].id
+
+    @staticmethod
+    def _find_active_run(thread_id):
+        runs = yield ApiCall("beta.threads.runs.list", thread_id=thread_id, order="desc", limit=ACTIVE_RUNS_LIMIT)
+        return next((run for run in runs.data if run.status in ACTIVE_RUN_STATUSES), None)
+
+    @staticmethod
+    def _on_stream_event(state: dict, event, deadline: float):
+        if time.monotonic() >= deadline:
+            raise Exception("Prazo do turno esgotado durante o stream")
+        if event.event == "thread.run.created":
+            state["run"] = event.data
+        elif event.event == "thread.message.completed" and event.data.role == "assistant":
+            state["replies"].append(OpenaiService.get_message_text(event.data))
+        elif event.event in RUN_FINAL_EVENTS:
+            state["final_run"] = state["run"] = event.data
+        elif event.event == "error":
+            raise Exception(f"Erro no stream da run: {event.data}")
 
     @staticmethod
-    def execute_run(assistant_id, business_phone, client, instance_name, thread_id, user_phone, attempt=0):
-        if attempt > 3:
-            logger.error(f"[execute_run] {instance_name} -> {user_phone} -> {thread_id}. ERRO na execução da run.")
-            raise Exception(f"[execute_run] attempt {attempt} > 3")
-        run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
-        count = 0
-        while run.status not in ["completed", "failed", "cancelled"]:
+    def _wait_for_run_steps(run, business_phone, instance_name, thread_id, user_phone, deadline, tool_outputs=None):
+        tool_outputs = {} if tool_outputs is None else tool_outputs
+        interval = OPENAI_POLL_INITIAL_SECONDS
+        cancel_requested = False
+        while run.status not in RUN_TERMINAL_STATUSES:
             logger.debug(f"[run.status] {run.status}")
-            time.sleep(1)
-            if count == 60:
+            if run.status == "requires_action" and not cancel_requested:
+                outputs = yield from OpenaiService._resolve_tool_calls(run, business_phone, user_phone, instance_name,
+                                                                       tool_outputs)
+                yield ApiCall("beta.threads.runs.submit_tool_outputs", thread_id=thread_id, run_id=run.id,
+                              tool_outputs=outputs)
+                interval = OPENAI_POLL_INITIAL_SECONDS
+            if not cancel_requested and time.monotonic() >= deadline:
                 logger.warning(f"[Run Timeout] Tempo limite de execução atingido, cancelando a execução.")
-                client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
-            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-            if run.status == "requires_action":
-                result = []
-                tool_calls = run.required_action.submit_tool_outputs.tool_calls
-                for tool_call in tool_calls:
-                    result.append(
-                        ToolHandler.resolve_and_submit_tool(business_phone, user_phone, instance_name, tool_call))
-                client.beta.threads.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=result
-                )
-            count += 1
-        if run.status in ["failed", "cancelled", "expired"]:
-            logger.warning(f"[AI] Run falhou ou foi cancelada.")
-            time.sleep(10)
-            attempt += 1
-            run = OpenaiService.execute_run(assistant_id, business_phone, client, instance_name, thread_id, user_phone,
-                                            attempt)
+                yield ApiCall("beta.threads.runs.cancel", thread_id=thread_id, run_id=run.id)
+                cancel_requested = True
+            elif cancel_requested and time.monotonic() >= deadline + OPENAI_CANCEL_GRACE_SECONDS:
+                raise Exception(f"[Run Timeout] Run {run.id} não finalizou após o cancelamento ({run.status})")
+            yield Sleep(interval)
+            interval = OpenaiService.get_next_poll_interval(interval)
+            run = yield ApiCall("beta.threads.runs.retrieve", thread_id=thread_id, run_id=run.id)
         return run
+
+    @staticmethod
+    def _resolve_tool_calls(run, business_phone, user_phone, instance_name, tool_outputs: dict):
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        pending = [tool_call for tool_call in tool_calls if tool_call.id not in tool_outputs]
+        if pending:
+            outputs = yield ResolveTools(business_phone, user_phone, instance_name, pending, run.expires_at)
+            tool_outputs.update({output["tool_call_id"]: output for output in outputs})
+        return [tool_outputs[tool_call.id] for tool_call in tool_calls]
+
+    @staticmethod
+    def _get_int_option(agent_config: dict, field: str, default: int) -> int:
+        value = agent_config.get(field)
+        if value in [None, ""]:
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.warning(f"[get_run_options] Valor inválido para {field}: {value!r}, usando {default}")
+            return default
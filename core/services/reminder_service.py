@@ -15,21 +15,21 @@ class ReminderService:
     def run():
         logger.info("[Reminder] Executando rotina de envio de lembretes de 24h...")
 
-        establishments = FirebaseClient.fetch_data("establishments") or {}
         target_date = TODAY + timedelta(days=1)
         calendar_service = get_calendar_service()
 
-        for establishments_phone, establishment_data in establishments.items():
-            if not establishment_data.get("config", {}).get("calendars"):
+        for establishments_phone, establishment in FirebaseClient.iter_children("establishments"):
+            config = (establishment or {}).get("config") or {}
+            if not config.get("calendars"):
                 continue
 
-            instance_name = establishment_data.get("config", {}).get("instance_name")
+            instance_name = config.get("instance_name")
             if not instance_name:
                 continue
 
             events_user_map = {}
 
-            for calendar_id in establishment_data.get("config", {}).get("calendars", []):
+            for calendar_id in config.get("calendars", []):
                 try:
                     start_dt = TIMEZONE.localize(datetime.combine(target_date, datetime.min.time()))
                     end_dt = TIMEZONE.localize(datetime.combine(target_date, datetime.max.time()))
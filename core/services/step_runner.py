@@ -0,0 +1,123 @@
+import asyncio
+import inspect
+import logging
+import time
+
+from core.services.openai_client_registry import OpenaiClientRegistry
+from core.services.tool_executor import tool_executor
+
+logger = logging.getLogger(__name__)
+
+
+class Blocking:
+
+    def __init__(self, function, *args, **kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+
+class ApiCall:
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        self.kwargs = kwargs
+
+
+class ApiStream:
+
+    def __init__(self, path: str, on_item, **kwargs):
+        self.path = path
+        self.on_item = on_item
+        self.kwargs = kwargs
+
+
+class Sleep:
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+
+class ResolveTools:
+
+    def __init__(self, business_phone: str, user_phone: str, instance_name: str, tool_calls, expires_at=None):
+        self.business_phone = business_phone
+        self.user_phone = user_phone
+        self.instance_name = instance_name
+        self.tool_calls = tool_calls
+        self.expires_at = expires_at
+
+
+class StepRunner:
+
+    @staticmethod
+    def run(business_phone: str, steps):
+        client = None
+        value, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if isinstance(step, Blocking):
+                    value = step.function(*step.args, **step.kwargs)
+                elif isinstance(step, Sleep):
+                    time.sleep(step.seconds)
+                elif isinstance(step, ResolveTools):
+                    value = tool_executor.resolve_all(step.business_phone, step.user_phone, step.instance_name,
+                                                      step.tool_calls, step.expires_at)
+                else:
+                    client = client or OpenaiClientRegistry.get_client(business_phone)
+                    function = StepRunner._get_method(client, step.path)
+                    if isinstance(step, ApiStream):
+                        with function(**step.kwargs) as stream:
+                            for item in stream:
+                                step.on_item(item)
+                    else:
+                        value = function(**step.kwargs)
+            except Exception as e:
+                error = e
+
+    @staticmethod
+    async def run_async(business_phone: str, steps):
+        client = None
+        value, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if isinstance(step, Blocking):
+                    value = await asyncio.to_thread(step.function, *step.args, **step.kwargs)
+                elif isinstance(step, Sleep):
+                    await asyncio.sleep(step.seconds)
+                elif isinstance(step, ResolveTools):
+                    value = await tool_executor.resolve_all_async(step.business_phone, step.user_phone,
+                                                                  step.instance_name, step.tool_calls,
+                                                                  step.expires_at)
+                else:
+                    client = client or await asyncio.to_thread(OpenaiClientRegistry.get_async_client,
+                                                               business_phone)
+                    function = StepRunner._get_method(client, step.path)
+                    if isinstance(step, ApiStream):
+                        manager = function(**step.kwargs)
+                        if inspect.isawaitable(manager):
+                            manager = await manager
+                        async with manager as stream:
+                            async for item in stream:
+                                step.on_item(item)
+                    else:
+                        value = await function(**step.kwargs)
+            except Exception as e:
+                error = e
+
+    @staticmethod
+    def _get_method(client, path: str):
+        target = client
+        for attribute in path.split("."):
+            target = getattr(target, attribute)
+        return target
@@ -1,10 +1,10 @@
 import logging
 import time
 
-from openai import OpenAI
-
 from core.dao.firebase_client import FirebaseClient
+from core.dao.firebase_write_batch import FirebaseWriteBatch
 from core.services.agent_service import AgentService
+from core.services.openai_client_registry import OpenaiClientRegistry
 from core.utils.constants import REUSE_THREAD_LAST_USED_TIMEOUT
 
 logger = logging.getLogger(__name__)
@@ -37,14 +37,17 @@ class ThreadService:
             return new_thread_id
 
     @staticmethod
-    def create_new_thread(business_phone, agent_id, path, user_phone, assistant_hash_instructions) -> str:
-        openai_key = FirebaseClient.fetch_data(f"establishments/{business_phone}/openai_key")
-        client = OpenAI(api_key=openai_key)
+    def create_new_thread(business_phone, agent_id, path, user_phone, assistant_hash_instructions,
+                          batch: FirebaseWriteBatch = None) -> str:
+        client = OpenaiClientRegistry.get_client(business_phone)
         thread = client.beta.threads.create()
         current_time = int(time.time())
         thread_info = {"thread_id": thread.id, "hash_instructions": assistant_hash_instructions,
                        "thread_last_used_at": current_time, "agent_last_used_at": current_time}
-        FirebaseClient.save_data(path, thread_info)
+        if batch:
+            batch.save_data(path, thread_info)
+        else:
+            FirebaseClient.save_data(path, thread_info)
         logger.info(
             f"[create_new_thread] Nova thread criada: {thread_info.get('thread_id')} para {user_phone}/{agent_id}")
         return thread_info.get("thread_id")
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from core.services.tool_handler import ToolHandler
+from core.utils.constants import TOOL_EXECUTOR_WORKERS, TOOL_CALL_TIMEOUT_SECONDS, TOOL_CALL_EXPIRY_MARGIN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY_TOOLS = ["verificar_disponibilidades", "verificar_agendamentos", "verificar_cadastro"]
+
+
+class ToolExecutor:
+
+    def __init__(self, size: int = TOOL_EXECUTOR_WORKERS, timeout_seconds: float = TOOL_CALL_TIMEOUT_SECONDS,
+                 metrics_window: int = 200):
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="tool-worker")
+        self._size = size
+        self._timeout_seconds = timeout_seconds
+        self._metrics_window = metrics_window
+        self._latencies = {}
+        self._timeouts = {}
+        self._lock = threading.Lock()
+
+    def resolve_all(self, business_phone: str, user_phone: str, instance_name: str, tool_calls,
+                    expires_at: float = None) -> list:
+        deadline = self._get_deadline(expires_at)
+        read_futures = self._submit_read_only(business_phone, user_phone, instance_name, tool_calls)
+        outputs = []
+        for index, tool_call in enumerate(tool_calls):
+            if index in read_futures:
+                try:
+                    outputs.append(read_futures[index].result(timeout=max(deadline - time.time(), 0)))
+                except TimeoutError:
+                    read_futures[index].cancel()
+                    outputs.append(self._timeout_output(tool_call, business_phone, user_phone))
+            elif time.time() >= deadline:
+                outputs.append(self._timeout_output(tool_call, business_phone, user_phone))
+            else:
+                outputs.append(self._submit(business_phone, user_phone, instance_name, tool_call).result())
+        return outputs
+
+    async def resolve_all_async(self, business_phone: str, user_phone: str, instance_name: str, tool_calls,
+                                expires_at: float = None) -> list:
+        deadline = self._get_deadline(expires_at)
+        read_futures = {index: asyncio.wrap_future(future) for index, future in
+                        self._submit_read_only(business_phone, user_phone, instance_name, tool_calls).items()}
+        outputs = []
+        for index, tool_call in enumerate(tool_calls):
+            if index in read_futures:
+                try:
+                    outputs.append(await asyncio.wait_for(read_futures[index],
+                                                          timeout=max(deadline - time.time(), 0)))
+                except asyncio.TimeoutError:
+                    outputs.append(self._timeout_output(tool_call, business_phone, user_phone))
+            elif time.time() >= deadline:
+                outputs.append(self._timeout_output(tool_call, business_phone, user_phone))
+            else:
+                outputs.append(await asyncio.wrap_future(self._submit(business_phone, user_phone, instance_name,
+                                                                      tool_call)))
+        return outputs
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            tools = {}
+            for tool_name in set(self._latencies) | set(self._timeouts):
+                latencies = sorted(self._latencies.get(tool_name, []))
+                tools[tool_name] = {
+                    "calls": len(latencies),
+                    "timeouts": self._timeouts.get(tool_name, 0),
+                    "latency_seconds_avg": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                    "latency_seconds_p95": round(latencies[int(len(latencies) * 0.95)], 3) if latencies else 0.0,
+                    "latency_seconds_max": round(latencies[-1], 3) if latencies else 0.0
+                }
+            return {"workers": self._size, "timeout_seconds": self._timeout_seconds, "tools": tools}
+
+    def _submit(self, business_phone: str, user_phone: str, instance_name: str, tool_call):
+        return self._executor.submit(self._timed_resolve, business_phone, user_phone, instance_name, tool_call)
+
+    def _submit_read_only(self, business_phone: str, user_phone: str, instance_name: str, tool_calls) -> dict:
+        return {index: self._submit(business_phone, user_phone, instance_name, tool_call)
+                for index, tool_call in enumerate(tool_calls) if tool_call.function.name in READ_ONLY_TOOLS}
+
+    def _timed_resolve(self, business_phone: str, user_phone: str, instance_name: str, tool_call) -> dict:
+        started_at = time.monotonic()
+        try:
+            return ToolHandler.resolve_and_submit_tool(business_phone, user_phone, instance_name, tool_call)
+        finally:
+            elapsed = time.monotonic() - started_at
+            with self._lock:
+                self._latencies.setdefault(tool_call.function.name, deque(maxlen=self._metrics_window)).append(elapsed)
+            logger.debug(f"[ToolExecutor] {tool_call.function.name} executada em {elapsed:.3f}s")
+
+    def _get_deadline(self, expires_at: float = None) -> float:
+        deadline = time.time() + self._timeout_seconds
+        if expires_at:
+            deadline = min(deadline, expires_at - TOOL_CALL_EXPIRY_MARGIN_SECONDS)
+        return deadline
+
+    def _timeout_output(self, tool_call, business_phone: str, user_phone: str) -> dict:
+        tool_name = tool_call.function.name
+        with self._lock:
+            self._timeouts[tool_name] = self._timeouts.get(tool_name, 0) + 1
+        logger.error(f"[ToolExecutor] Tempo limite excedido na tool '{tool_name}' -> {business_phone} -> {user_phone}")
+        return {"tool_call_id": tool_call.id,
+                "output": json.dumps({"status": "error", "message": "Tempo limite excedido ao executar a função"})}
+
+
+tool_executor = ToolExecutor()
@@ -6,12 +6,14 @@ from openai.types.beta.threads import RequiredActionFunctionToolCall
 
 from clients.sec24.registration.registration_service import SEC24UserService
 from core.dao.firebase_client import FirebaseClient
+from core.dao.firebase_write_batch import FirebaseWriteBatch
 from core.services.agent_service import AgentService
 from core.services.buffer.buffer_service import BufferService
 from core.services.calendar.calendar_functions import get_appointments, check_availabilities, reschedule_appointments, \
     cancel_appointments, \
     create_appointments
 from core.services.thread_service import ThreadService
+from core.utils.constants import CHAT_COMPLETIONS_ENGINE
 
 logger = logging.getLogger(__name__)
 
@@ -80,20 +82,27 @@ class ToolHandler:
         if not context_summary:
             return ToolHandler._build_error_response(f"Parâmetro 'context_summary' ausente.")
         path = f"establishments/{business_phone}/users/{user_phone}/threads/{new_agent_id}"
-        assistant_hash_instructions = AgentService.get_assistant_hash_instructions(business_phone, new_agent_id)
-        ThreadService.create_new_thread(business_phone, new_agent_id, path, user_phone, assistant_hash_instructions)
-        BufferService.add_to_buffer(business_phone, user_phone, f"⚠️ CONTEXTO AUTOMÁTICO: {context_summary}",
-                                    instance_name)
-        BufferService.add_to_buffer(business_phone, user_phone, "Olá", instance_name)
-        FirebaseClient.save_data(f"establishments/{business_phone}/users/{user_phone}/current_agent", new_agent_id)
+        with FirebaseWriteBatch() as batch:
+            if agent_info.get("engine") == CHAT_COMPLETIONS_ENGINE:
+                batch.update_data(path, {"agent_last_used_at": int(time.time())})
+            else:
+                assistant_hash_instructions = AgentService.get_assistant_hash_instructions(business_phone,
+                                                                                           new_agent_id)
+                ThreadService.create_new_thread(business_phone, new_agent_id, path, user_phone,
+                                                assistant_hash_instructions, batch)
+            BufferService.add_messages_to_buffer(business_phone, user_phone,
+                                                 [f"⚠️ CONTEXTO AUTOMÁTICO: {context_summary}", "Olá"],
+                                                 instance_name, batch)
+            batch.save_data(f"establishments/{business_phone}/users/{user_phone}/current_agent", new_agent_id)
         return ToolHandler._build_success_response("Troca de agente concluída com sucesso")
 
     @staticmethod
     def _handle_human_attendance(business_phone, user_phone):
-        FirebaseClient.save_data(f"establishments/{business_phone}/users/{user_phone}/human_attendance/active", True)
-        FirebaseClient.save_data(
-            f"establishments/{business_phone}/users/{user_phone}/human_attendance/last_message_timestamp",
-            int(time.time()))
+        human_attendance_path = f"establishments/{business_phone}/users/{user_phone}/human_attendance"
+        FirebaseClient.multi_update({
+            f"{human_attendance_path}/active": True,
+            f"{human_attendance_path}/last_message_timestamp": int(time.time())
+        })
         logger.info(f"Atendimento humano iniciado para {user_phone} em {business_phone}")
         return ToolHandler._build_success_response("Atendimento humano iniciado com sucesso")
 
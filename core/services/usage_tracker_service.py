@@ -1,6 +1,80 @@
+import logging
+import threading
 from datetime import datetime
 
 from core.dao.firebase_client import FirebaseClient
+from core.utils.constants import USAGE_FLUSH_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class UsageAggregator:
+
+    def __init__(self, flush_interval_seconds: int):
+        self._flush_interval_seconds = flush_interval_seconds
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, establishment_id: str, input_tokens: int, output_tokens: int):
+        month_key = datetime.now().strftime("%Y-%m")
+        with self._lock:
+            totals = self._pending.setdefault((establishment_id, month_key), [0, 0])
+            totals[0] += input_tokens or 0
+            totals[1] += output_tokens or 0
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return True
+
+        now = int(datetime.now().timestamp())
+        updates = {}
+        for (establishment_id, month_key), (input_tokens, output_tokens) in pending.items():
+            path = f"establishments/{establishment_id}/usage/{month_key}"
+            updates[f"{path}/tokens_input"] = FirebaseClient.server_increment(input_tokens)
+            updates[f"{path}/tokens_output"] = FirebaseClient.server_increment(output_tokens)
+            updates[f"{path}/last_update"] = now
+
+        if FirebaseClient.multi_update(updates):
+            logger.debug(f"[UsageAggregator] Uso de tokens gravado para {len(pending)} estabelecimento(s)")
+            return True
+
+        logger.error(f"[UsageAggregator] Falha ao gravar uso de tokens, mantendo {len(pending)} item(ns) pendente(s)")
+        with self._lock:
+            for key, (input_tokens, output_tokens) in pending.items():
+                totals = self._pending.setdefault(key, [0, 0])
+                totals[0] += input_tokens
+                totals[1] += output_tokens
+        return False
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        logger.debug("UsageAggregator iniciado.")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        logger.debug("UsageAggregator finalizado.")
+
+    def _run_loop(self):
+        while not self._stop_event.wait(self._flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erro no UsageAggregator: {str(e)}")
+
+
+usage_aggregator = UsageAggregator(USAGE_FLUSH_INTERVAL_SECONDS)
 
 
 class UsageTrackerService:
@@ -10,15 +84,4 @@ class UsageTrackerService:
         if not establishment_id:
             return
 
-        month_key = datetime.now().strftime("%Y-%m")
-        path = f"establishments/{establishment_id}/usage/{month_key}"
-
-        existing = FirebaseClient.fetch_data(path) or {}
-
-        updated = {
-            "tokens_input": existing.get("tokens_input", 0) + input_tokens,
-            "tokens_output": existing.get("tokens_output", 0) + output_tokens,
-            "last_update": int(datetime.now().timestamp())
-        }
-
-        FirebaseClient.save_data(path, updated)
+        usage_aggregator.add(establishment_id, input_tokens, output_tokens)
@@ -11,12 +11,55 @@ def get_environment():
 
 ENVIRONMENT = os.environ.get("RAILWAY_ENVIRONMENT_NAME")
 
+BUFFER_COLLECTOR_MODE = os.environ.get("BUFFER_COLLECTOR_MODE", "listen").lower()
 BUFFER_COLLECTOR_CHECK_INTERVAL_SECONDS = 3
+BUFFER_COLLECTOR_MAX_IDLE_SECONDS = 30
+ZOMBIE_BUFFER_CHECK_INTERVAL_SECONDS = 30
+BUFFER_WORKER_POOL_SIZE = int(os.environ.get("BUFFER_WORKER_POOL_SIZE", 8))
+BUFFER_WORKER_DRAIN_TIMEOUT_SECONDS = 60
+CONVERSATION_PIPELINE = os.environ.get("CONVERSATION_PIPELINE", "thread").lower()
+BUFFER_ASYNC_MAX_IN_FLIGHT = int(os.environ.get("BUFFER_ASYNC_MAX_IN_FLIGHT", 256))
+BUFFER_ASYNC_BRIDGE_THREADS = int(os.environ.get("BUFFER_ASYNC_BRIDGE_THREADS", 32))
+BUFFER_TENANT_MAX_IN_FLIGHT = int(os.environ.get("BUFFER_TENANT_MAX_IN_FLIGHT", 4))
+BUFFER_TENANT_MAX_QUEUED = int(os.environ.get("BUFFER_TENANT_MAX_QUEUED", 20))
+BUFFER_TENANT_DEFAULT_WEIGHT = 1
+BUFFER_TENANT_POLICY_TTL_SECONDS = 60
+BUFFER_MAX_QUEUED_TURNS = int(os.environ.get("BUFFER_MAX_QUEUED_TURNS", 200))
+BUFFER_SHED_RETRY_SECONDS = 15
+BUFFER_SHED_NOTICE_WORKERS = 2
+BUFFER_OVERLOAD_MESSAGE = os.environ.get(
+    "BUFFER_OVERLOAD_MESSAGE",
+    "Recebemos sua mensagem! Estamos com um volume alto de atendimentos e retornaremos em breve.")
 PRESENCE_LAST_UPDATE_BEFORE_FORCE_AVAILABLE_TIMEOUT_SECONDS = 60
 PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS = 5
+BUFFER_DEBOUNCE_MIN_SECONDS = float(os.environ.get("BUFFER_DEBOUNCE_MIN_SECONDS", 1.5))
+BUFFER_DEBOUNCE_MAX_SECONDS = float(os.environ.get("BUFFER_DEBOUNCE_MAX_SECONDS", 12))
+BUFFER_DEBOUNCE_FOLLOWUP_WINDOW_SECONDS = 30
+BUFFER_DEBOUNCE_HISTORY_SIZE = 20
+BUFFER_DEBOUNCE_MAX_TRACKED_USERS = 10000
 ZOMBIE_BUFFER_TIMEOUT_SECONDS = 2 * 60
 
 REPLICA_ID = str(uuid.uuid4())[:8]
+REPLICA_HEARTBEAT_INTERVAL_SECONDS = 2
+REPLICA_HEARTBEAT_TIMEOUT_SECONDS = 8
+HASH_RING_VIRTUAL_NODES = 64
+BUFFER_SHARD_COUNT = int(os.environ.get("BUFFER_SHARD_COUNT", 32))
+BUFFER_SHARD_LEASE_SECONDS = 10
+
+FIREBASE_BACKEND = os.environ.get("FIREBASE_BACKEND", "firebase").lower()
+FIREBASE_LOCAL_SEED_FILE = os.environ.get("FIREBASE_LOCAL_SEED_FILE")
+
+FIREBASE_CACHE_ENABLED = os.environ.get("FIREBASE_CACHE_ENABLED", "false").lower() == "true"
+FIREBASE_CACHE_MAX_ENTRIES = int(os.environ.get("FIREBASE_CACHE_MAX_ENTRIES", 5000))
+FIREBASE_CACHE_TTL_SECONDS = {
+    "establishments/*/openai_key": 5 * 60,
+    "establishments/*/config": 60,
+    "establishments/*/agents": 60
+}
+
+FIREBASE_ASYNC_ENABLED = os.environ.get("FIREBASE_ASYNC_ENABLED", "false").lower() == "true"
+FIREBASE_ASYNC_MAX_CONNECTIONS = int(os.environ.get("FIREBASE_ASYNC_MAX_CONNECTIONS", 50))
+FIREBASE_ASYNC_TIMEOUT_SECONDS = 10
 
 INTERNAL_DATETIME_FORMAT = "%d/%m/%Y %H:%M"
 INTERNAL_DATE_FORMAT = "%d/%m/%Y"
@@ -50,6 +93,38 @@ MAX_MESSAGE_LENGTH = 500
 
 REUSE_THREAD_LAST_USED_TIMEOUT = 10 * 60
 
+USAGE_FLUSH_INTERVAL_SECONDS = int(os.environ.get("USAGE_FLUSH_INTERVAL_SECONDS", 30))
+
+OPENAI_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", 60))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_CONNECT_TIMEOUT_SECONDS", 5))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 2))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", 100))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20))
+OPENAI_RUN_MODE = os.environ.get("OPENAI_RUN_MODE", "stream").lower()
+OPENAI_INLINE_RUN_MESSAGES = os.environ.get("OPENAI_INLINE_RUN_MESSAGES", "true").lower() == "true"
+OPENAI_TRUNCATION_LAST_MESSAGES = int(os.environ.get("OPENAI_TRUNCATION_LAST_MESSAGES", 0))
+OPENAI_MAX_PROMPT_TOKENS = int(os.environ.get("OPENAI_MAX_PROMPT_TOKENS", 0))
+OPENAI_TURN_DEADLINE_SECONDS = float(os.environ.get("OPENAI_TURN_DEADLINE_SECONDS", 120))
+OPENAI_POLL_INITIAL_SECONDS = float(os.environ.get("OPENAI_POLL_INITIAL_SECONDS", 0.15))
+OPENAI_POLL_MAX_SECONDS = float(os.environ.get("OPENAI_POLL_MAX_SECONDS", 2))
+OPENAI_POLL_BACKOFF_FACTOR = 1.5
+OPENAI_CANCEL_GRACE_SECONDS = float(os.environ.get("OPENAI_CANCEL_GRACE_SECONDS", 10))
+OPENAI_RUN_MAX_ATTEMPTS = int(os.environ.get("OPENAI_RUN_MAX_ATTEMPTS", 3))
+OPENAI_RETRY_BASE_SECONDS = 1
+OPENAI_RETRY_MAX_SECONDS = 10
+OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get("OPENAI_RATE_LIMIT_MAX_WAIT_SECONDS", 30))
+OPENAI_RATE_LIMIT_TOKEN_RESERVE = int(os.environ.get("OPENAI_RATE_LIMIT_TOKEN_RESERVE", 2000))
+CHAT_COMPLETIONS_ENGINE = "chat_completions"
+CHAT_HISTORY_WINDOW = int(os.environ.get("CHAT_HISTORY_WINDOW", 20))
+CHAT_MAX_TOOL_ROUNDS = 8
+
+TOOL_EXECUTOR_WORKERS = int(os.environ.get("TOOL_EXECUTOR_WORKERS", 16))
+TOOL_CALL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_CALL_TIMEOUT_SECONDS", 30))
+TOOL_CALL_EXPIRY_MARGIN_SECONDS = 5
+
+ASSISTANT_METADATA_TTL_SECONDS = int(os.environ.get("ASSISTANT_METADATA_TTL_SECONDS", 5 * 60))
+ASSISTANT_METADATA_IDLE_SECONDS = 24 * 60 * 60
+
 WEEK_DAYS = {
     0: "segunda-feira",
     1: "terça-feira",
@@ -11,8 +11,13 @@ from core.controllers.admin_controller import admin_router
 from core.controllers.health_controller import health_router
 from core.controllers.reminder_controller import reminder_router
 from core.controllers.whatsapp_controller import whatsapp_router
+from core.dao.async_firebase_client import AsyncFirebaseClient
 from core.dao.firebase_client import init_firebase, FirebaseClient
-from core.services.buffer.buffer_collector import BufferCollector
+from core.services.assistant_metadata_cache import assistant_metadata_cache
+from core.services.buffer.buffer_collector import buffer_collector
+from core.services.openai_client_registry import OpenaiClientRegistry
+from core.services.tool_executor import tool_executor
+from core.services.usage_tracker_service import usage_aggregator
 from core.utils.constants import REPLICA_ID, get_environment
 from core.utils.logger_config import setup_logger
 
@@ -27,9 +32,17 @@ async def lifespan(app: FastAPI):
     init_firebase()
     FirebaseClient.get_reference('healthcheck').set({"status": "ok", "timestamp": {".sv": "timestamp"}})
     logger.debug("Firebase inicializado com sucesso.")
-    BufferCollector().start()
+    buffer_collector.start()
     logger.debug("BufferCollector inicializado com sucesso.")
+    usage_aggregator.start()
+    assistant_metadata_cache.start()
     yield
+    buffer_collector.stop()
+    usage_aggregator.stop()
+    assistant_metadata_cache.stop()
+    tool_executor.shutdown()
+    OpenaiClientRegistry.close()
+    await AsyncFirebaseClient.aclose()
 
 
 app = FastAPI(lifespan=lifespan)
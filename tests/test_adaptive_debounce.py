@@ -0,0 +1,47 @@
+from core.dao.push_id import generate_push_id
+from core.services.buffer.adaptive_debounce import AdaptiveDebounce, MIN_SAMPLES
+from core.utils.constants import BUFFER_DEBOUNCE_MIN_SECONDS, PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS
+
+BUFFER_KEY = "5511999990000_5511988887777"
+
+
+def _send_turn(debounce: AdaptiveDebounce, messages: dict, *timestamps_ms: int) -> float:
+    for timestamp_ms in timestamps_ms:
+        messages[generate_push_id(timestamp_ms)] = "mensagem"
+        debounce.observe(BUFFER_KEY, {"messages": dict(messages)})
+    wait = debounce.record_decision(BUFFER_KEY)
+    messages.clear()
+    return wait
+
+
+def test_single_shot_sender_reaches_min():
+    debounce = AdaptiveDebounce()
+    messages = {}
+    start_ms = 1_700_000_000_000
+    waits = [_send_turn(debounce, messages, start_ms + turn * 120_000) for turn in range(MIN_SAMPLES + 2)]
+
+    assert waits[0] == PRESENCE_LAST_UPDATE_MINIMUM_FOR_PROCESS_SECONDS
+    assert waits[-1] == BUFFER_DEBOUNCE_MIN_SECONDS
+    assert debounce.metrics()["decisions"]["min"] > 0
+
+
+def test_burst_sender_learns_gap_within_turn():
+    debounce = AdaptiveDebounce()
+    messages = {}
+    start_ms = 1_700_000_000_000
+    for turn in range(MIN_SAMPLES + 1):
+        turn_ms = start_ms + turn * 120_000
+        _send_turn(debounce, messages, turn_ms, turn_ms + 4_000, turn_ms + 8_000)
+
+    assert debounce.get_wait(BUFFER_KEY) >= 4
+
+
+def test_gap_between_turns_is_not_learned():
+    debounce = AdaptiveDebounce()
+    messages = {}
+    start_ms = 1_700_000_000_000
+    _send_turn(debounce, messages, start_ms, start_ms + 2_000)
+    _send_turn(debounce, messages, start_ms + 20_000)
+
+    cadence = debounce._users[BUFFER_KEY]
+    assert list(cadence.gaps) == [2.0]
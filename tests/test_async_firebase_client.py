@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from core.dao import async_firebase_client
+from core.dao.async_firebase_client import AsyncFirebaseClient
+
+BASE_URL = "https://evolution-test.firebaseio.com"
+
+
+class FakeCredentials:
+
+    def __init__(self):
+        self.valid = False
+        self.token = None
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        self.valid = True
+
+
+class FakeDatabase:
+
+    def __init__(self, data: dict = None, status_code: int = 200):
+        self.data = data or {}
+        self.status_code = status_code
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "indisponível"})
+        path = request.url.path.removesuffix(".json").strip("/")
+        if request.method == "GET":
+            return httpx.Response(200, json=self.data.get(path))
+        if request.method == "PATCH":
+            self.data.setdefault(path, {}).update(json.loads(request.content))
+        elif request.method == "DELETE":
+            self.data.pop(path, None)
+        return httpx.Response(204)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    fake = FakeDatabase()
+    credentials = FakeCredentials()
+    monkeypatch.delenv("FIREBASE_DATABASE_EMULATOR_HOST", raising=False)
+    monkeypatch.setattr(async_firebase_client, "REST_ENABLED", True)
+    monkeypatch.setattr(async_firebase_client, "firebase_cache", None)
+    monkeypatch.setattr(AsyncFirebaseClient, "_base_url", BASE_URL)
+    monkeypatch.setattr(AsyncFirebaseClient, "_base_params", {})
+    monkeypatch.setattr(AsyncFirebaseClient, "_credentials", credentials)
+    monkeypatch.setattr(AsyncFirebaseClient, "_token_lock", None)
+    monkeypatch.setattr(AsyncFirebaseClient, "_http_client", None)
+    monkeypatch.setattr(AsyncFirebaseClient, "_get_http_client",
+                        staticmethod(lambda: _get_mock_client(fake)))
+    fake.credentials = credentials
+    return fake
+
+
+def _get_mock_client(fake: FakeDatabase):
+    if AsyncFirebaseClient._http_client is None:
+        AsyncFirebaseClient._http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+    return AsyncFirebaseClient._http_client
+
+
+def _run(coroutine):
+    async def run_and_close():
+        try:
+            return await coroutine
+        finally:
+            await AsyncFirebaseClient.aclose()
+
+    return asyncio.run(run_and_close())
+
+
+def test_fetch_update_delete(database):
+    database.data["establishments/5511/config"] = {"instance_name": "loja"}
+
+    async def scenario():
+        fetched = await AsyncFirebaseClient.fetch_data("establishments/5511/config")
+        updated = await AsyncFirebaseClient.update_data("establishments/5511/config", {"calendars": ["agenda"]})
+        after_update = await AsyncFirebaseClient.fetch_data("establishments/5511/config")
+        deleted = await AsyncFirebaseClient.delete_data("establishments/5511/config")
+        after_delete = await AsyncFirebaseClient.fetch_data("establishments/5511/config")
+        return fetched, updated, after_update, deleted, after_delete
+
+    fetched, updated, after_update, deleted, after_delete = _run(scenario())
+
+    assert fetched == {"instance_name": "loja"}
+    assert updated is True
+    assert after_update == {"instance_name": "loja", "calendars": ["agenda"]}
+    assert deleted is True
+    assert after_delete is None
+    assert [request.method for request in database.requests] == ["GET", "PATCH", "GET", "DELETE", "GET"]
+    assert all(request.url.params.get("print") == "silent"
+               for request in database.requests if request.method in ["PATCH", "DELETE"])
+
+
+def test_token_is_refreshed_once_and_shared(database):
+    async def scenario():
+        return await asyncio.gather(*[AsyncFirebaseClient.fetch_data(f"users/{index}") for index in range(10)])
+
+    _run(scenario())
+
+    assert database.credentials.refreshes == 1
+    assert {request.headers["Authorization"] for request in database.requests} == {"Bearer token-1"}
+
+
+def test_expired_token_is_refreshed(database):
+    async def scenario():
+        await AsyncFirebaseClient.fetch_data("users/1")
+        database.credentials.valid = False
+        await AsyncFirebaseClient.fetch_data("users/2")
+
+    _run(scenario())
+
+    assert database.credentials.refreshes == 2
+    assert [request.headers["Authorization"] for request in database.requests] == ["Bearer token-1",
+                                                                                    "Bearer token-2"]
+
+
+def test_errors_return_sync_client_fallbacks(database):
+    database.status_code = 503
+
+    async def scenario():
+        return (await AsyncFirebaseClient.fetch_data("users/1"),
+                await AsyncFirebaseClient.update_data("users/1", {"name": "Ana"}),
+                await AsyncFirebaseClient.delete_data("users/1"),
+                await AsyncFirebaseClient.save_data("users/1", {"name": "Ana"}),
+                await AsyncFirebaseClient.push_data("users", {"name": "Ana"}))
+
+    assert _run(scenario()) == (None, False, False, False, None)
@@ -0,0 +1,28 @@
+from core.dao.firebase_client import FirebaseClient
+
+
+def _fake_query(children: dict, calls: list):
+    def query(path, start_at=None, limit_to_first=None, **kwargs):
+        calls.append((path, start_at, limit_to_first))
+        keys = sorted(key for key in children if start_at is None or key >= start_at)
+        return {key: children[key] for key in keys[:limit_to_first]}
+
+    return query
+
+
+def test_iter_children_pages_by_key_without_duplicates(monkeypatch):
+    children = {f"est{index:03d}": {"config": {"index": index}} for index in range(25)}
+    calls = []
+    monkeypatch.setattr(FirebaseClient, "query", staticmethod(_fake_query(children, calls)))
+
+    result = list(FirebaseClient.iter_children("establishments", page_size=10))
+
+    assert [key for key, _ in result] == sorted(children)
+    assert calls == [("establishments", None, 10), ("establishments", "est009", 11),
+                     ("establishments", "est019", 11)]
+
+
+def test_iter_children_empty_path(monkeypatch):
+    monkeypatch.setattr(FirebaseClient, "query", staticmethod(_fake_query({}, [])))
+
+    assert list(FirebaseClient.iter_children("establishments")) == []
@@ -2,6 +2,7 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 from core.dao.firebase_client import init_firebase, FirebaseClient
+from core.services.buffer.buffer_service import BufferService
 from core.services.process_message_service import ProcessMessageService
 
 init_firebase()
@@ -47,8 +48,10 @@ while True:
         continue
 
     if msg.lower() == "reset":
-        FirebaseClient.delete_data(f"establishments/{business_phone}/users/{user_phone}")
-        FirebaseClient.delete_data(f"message_buffers/{user_phone}")
+        FirebaseClient.multi_update({
+            f"establishments/{business_phone}/users/{user_phone}": None,
+            BufferService.get_buffer_path(BufferService.get_buffer_key(business_phone, user_phone)): None
+        })
         print("🗑️ Dados resetados com sucesso.")
         continue
 
@@ -0,0 +1,75 @@
+"""
+Move os buffers do layout antigo (message_buffers/{user}) para os shards
+(message_buffers/{shard}/{establishment}_{user}). Buffers em um shard que não
+corresponde mais ao BUFFER_SHARD_COUNT também são movidos, então o script pode
+ser executado novamente após alterar a quantidade de shards.
+
+Para usar: python -m tools.migrate_message_buffers [--dry-run]
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+from core.dao.firebase_client import init_firebase, FirebaseClient
+from core.services.buffer.buffer_service import BufferService
+
+
+def _merge_buffers(old_buffer: dict, current: dict) -> dict:
+    if not current:
+        return old_buffer
+    merged = {**old_buffer, **current}
+    messages = BufferService.get_buffer_messages(old_buffer) + BufferService.get_buffer_messages(current)
+    if messages:
+        merged["messages"] = messages
+    return merged
+
+
+def _find_misplaced_buffers() -> list:
+    misplaced = []
+    shard_ids = set(BufferService.get_all_shards())
+    for key in FirebaseClient.fetch_keys("message_buffers"):
+        if not key.startswith("shard_"):
+            misplaced.append((f"message_buffers/{key}", key))
+            continue
+        for buffer_key in FirebaseClient.fetch_keys(f"message_buffers/{key}"):
+            if key not in shard_ids or "_" not in buffer_key or BufferService.get_shard(buffer_key) != key:
+                misplaced.append((f"message_buffers/{key}/{buffer_key}", buffer_key))
+    return misplaced
+
+
+def migrate(dry_run: bool):
+    misplaced = _find_misplaced_buffers()
+    print(f"🔎 {len(misplaced)} buffer(s) fora do shard correto")
+
+    for old_path, buffer_key in misplaced:
+        old_buffer = FirebaseClient.fetch_data(old_path)
+        if "_" not in buffer_key:
+            business_phone = old_buffer.get("establishment_phone") if isinstance(old_buffer, dict) else None
+            if not business_phone:
+                print(f"⚠️ {old_path} sem establishment_phone, mantido no local original")
+                continue
+            buffer_key = BufferService.get_buffer_key(business_phone, buffer_key)
+        new_path = BufferService.get_buffer_path(buffer_key)
+        print(f"➡️ {old_path} -> {new_path}")
+        if dry_run:
+            continue
+        if isinstance(old_buffer, dict):
+            merged = FirebaseClient.run_transaction(new_path,
+                                                    lambda current, data=old_buffer: _merge_buffers(data, current))
+            if merged is None:
+                print(f"⚠️ Falha ao mover {old_path}, mantido no local original")
+                continue
+        FirebaseClient.delete_data(old_path)
+
+    print("✅ Migração concluída" if not dry_run else "ℹ️ Nenhuma alteração feita (--dry-run)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra message_buffers para o layout com shards")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista os buffers que seriam movidos")
+    args = parser.parse_args()
+
+    init_firebase()
+    migrate(args.dry_run)